@@ -17,20 +17,27 @@ The Agent encapsulates:
 The Action enum enumerates all discrete actions that controllers can choose,
 and is shared across the different controller implementations and the GA.
 """
-from enum import Enum, auto
-from typing import Tuple
+from enum import IntEnum
+from typing import Optional, Tuple
 
 import pygame
 
 from config import TILE_SIZE, COLOR_AGENT
-from dungeon import Dungeon, TileType
-from sprites import SPRITE_PLAYER
+from dungeon import (
+    Dungeon,
+    MONSTER_MELEE_CODE,
+    MONSTER_MAGIC_CODE,
+    HEALTH_POTION_CODE,
+    MANA_POTION_CODE,
+    COIN_CODE,
+)
+from sprites import SPRITE_PLAYER, display_sprite, get_sprite
 
 
 Pos = Tuple[int, int]
 
 
-class Action(Enum):
+class Action(IntEnum):
     """Enumerated action space available to any controller.
 
         Actions include:
@@ -39,16 +46,38 @@ class Action(Enum):
             - Resource usage: DRINK_HEALTH, DRINK_MANA
 
         Controllers choose one of these at every time step.
+
+        Values are contiguous from 0 so an Action can index tuples/arrays
+        directly (see ACTION_DELTA).
         """
-    UP = auto()
-    DOWN = auto()
-    LEFT = auto()
-    RIGHT = auto()
-    STAY = auto()
-    MELEE = auto()
-    MAGIC_BLAST = auto()
-    DRINK_HEALTH = auto()
-    DRINK_MANA = auto()
+    UP = 0
+    DOWN = 1
+    LEFT = 2
+    RIGHT = 3
+    STAY = 4
+    MELEE = 5
+    MAGIC_BLAST = 6
+    DRINK_HEALTH = 7
+    DRINK_MANA = 8
+
+
+# Indexed by Action: (dx, dy) for movement actions, None for actions that
+# do not move the agent.
+ACTION_DELTA: Tuple[Optional[Tuple[int, int]], ...] = (
+    (0, -1),  # UP
+    (0, 1),   # DOWN
+    (-1, 0),  # LEFT
+    (1, 0),   # RIGHT
+    (0, 0),   # STAY
+    None,     # MELEE
+    None,     # MAGIC_BLAST
+    None,     # DRINK_HEALTH
+    None,     # DRINK_MANA
+)
+
+
+# Tiles an attack reaches: the four neighbours plus the agent's own tile
+ATTACK_OFFSETS: Tuple[Tuple[int, int], ...] = ((-1, 0), (1, 0), (0, -1), (0, 1), (0, 0))
 
 
 class Agent:
@@ -70,6 +99,22 @@ class Agent:
     Controllers (GA, human, hill-climber, etc.) use this API.
     """
 
+    __slots__ = (
+        "start_pos",
+        "x",
+        "y",
+        "max_health",
+        "health",
+        "max_mana",
+        "mana",
+        "health_potions",
+        "mana_potions",
+        "damage_taken",
+        "monsters_killed",
+        "potions_collected",
+        "coins_collected",
+    )
+
     def __init__(self, start_pos: Pos):
         """Initialize a fresh agent at the given start position.
 
@@ -116,27 +161,26 @@ class Agent:
         self.health -= amount
         self.damage_taken += amount
 
-    def melee_attack(self, dungeon: Dungeon) -> None:
-        """Sword attack kills melee-weak monster"""
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
+    def _kill_adjacent(self, dungeon: Dungeon, monster_code: int) -> None:
+        """Kill the first monster with the given tile code in attack range"""
+        w, h, grid = dungeon.width, dungeon.height, dungeon.grid
+        for dx, dy in ATTACK_OFFSETS:
             x, y = self.x + dx, self.y + dy
-            if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == TileType.MONSTER_MELEE:
+            if 0 <= x < w and 0 <= y < h and grid[y, x] == monster_code:
                 dungeon.clear_tile(x, y)
                 self.monsters_killed += 1
                 break
 
+    def melee_attack(self, dungeon: Dungeon) -> None:
+        """Sword attack kills melee-weak monster"""
+        self._kill_adjacent(dungeon, MONSTER_MELEE_CODE)
+
     def magic_blast(self, dungeon: Dungeon) -> None:
         """Magic blast consumes 1 mana, kills magic-weak monster"""
         if self.mana <= 0:
             return
         self.mana -= 1
-
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            x, y = self.x + dx, self.y + dy
-            if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == TileType.MONSTER_MAGIC:
-                dungeon.clear_tile(x, y)
-                self.monsters_killed += 1
-                break
+        self._kill_adjacent(dungeon, MONSTER_MAGIC_CODE)
 
     def drink_health_potion(self) -> None:
         if self.health_potions > 0 and self.health < self.max_health:
@@ -150,37 +194,33 @@ class Agent:
 
     def _pickup_tile(self, dungeon: Dungeon) -> None:
         """Pick up items by moving over them"""
-        tile = dungeon.get_tile(self.x, self.y)
+        code = dungeon.grid[self.y, self.x]
 
-        if tile == TileType.HEALTH_POTION:
+        if code == HEALTH_POTION_CODE:
             self.health_potions += 1
             self.potions_collected += 1
             dungeon.clear_tile(self.x, self.y)
 
-        elif tile == TileType.MANA_POTION:
+        elif code == MANA_POTION_CODE:
             self.mana_potions += 1
             self.potions_collected += 1
             dungeon.clear_tile(self.x, self.y)
 
-        elif tile == TileType.COIN:
+        elif code == COIN_CODE:
             self.coins_collected += 1
             dungeon.clear_tile(self.x, self.y)
 
     def step(self, action: Action, dungeon: Dungeon) -> None:
         """Apply an action"""
-        dx, dy = 0, 0
-
-        # Movement
-        if action == Action.UP:
-            dy = -1
-        elif action == Action.DOWN:
-            dy = 1
-        elif action == Action.LEFT:
-            dx = -1
-        elif action == Action.RIGHT:
-            dx = 1
-        elif action == Action.STAY:
-            dx = dy = 0
+        delta = ACTION_DELTA[action]
+
+        if delta is not None:
+            new_x = self.x + delta[0]
+            new_y = self.y + delta[1]
+            # one step from an in-bounds tile, so the padded mask needs no bounds check
+            if dungeon.walkable[new_y + 1, new_x + 1]:
+                self.x = new_x
+                self.y = new_y
         elif action == Action.MELEE:
             self.melee_attack(dungeon)
         elif action == Action.MAGIC_BLAST:
@@ -190,14 +230,6 @@ class Agent:
         elif action == Action.DRINK_MANA:
             self.drink_mana_potion()
 
-        # Actually move
-        if action in (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT, Action.STAY):
-            new_x = self.x + dx
-            new_y = self.y + dy
-            if dungeon.is_walkable(new_x, new_y):
-                self.x = new_x
-                self.y = new_y
-
         # Pickup items and then take monster damage
         self._pickup_tile(dungeon)
         dungeon.apply_monster_damage(self)
@@ -212,7 +244,7 @@ class Agent:
                     surface (pygame.Surface): PyGame surface to draw onto.
         """
         surface.blit(
-            SPRITE_PLAYER,
+            display_sprite(get_sprite(SPRITE_PLAYER)),
             (self.x * TILE_SIZE, self.y * TILE_SIZE),
         )
 
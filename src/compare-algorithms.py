@@ -20,10 +20,15 @@ For each controller, this script:
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
-import statistics
+from functools import partial
+from multiprocessing import Pool
+from multiprocessing.pool import Pool as PoolType
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
 
-from training import run_episode, MAX_STEPS_PER_EPISODE
+import numpy as np
+
+from training import EPISODE_CODE_VERSION, episode_stats_from_row, run_episode
 from controllers import DecisionTreeController
 
 # Optional imports (kept resilient to naming/location changes)
@@ -44,6 +49,60 @@ except Exception:
     BEST_GENOME = None  # type: ignore
 
 
+# Episode results keyed by (controller key, seed). DecisionTreeController
+# episodes are fully determined by genome + seed, so repeated comparisons of
+# the same BEST_GENOME can skip re-simulating floors, even across runs while
+# the episode code (training.EPISODE_CODE_VERSION) is unchanged. Saved as
+# plain arrays in an .npz (no pickles), one cached episode per row:
+#   version  the EPISODE_CODE_VERSION string
+#   genomes  (N, num_genes) int64 DecisionTreeController genomes
+#   seeds    (N,) floor seeds
+#   stats    (N, 9) int64 EpisodeStats rows
+EPISODE_CACHE_PATH = "compare_cache.npz"
+_EP_CACHE: Dict[Tuple, Tuple] = {}
+
+
+def _controller_cache_key(controller) -> Optional[Tuple]:
+    """
+    Stable key for controllers whose episodes depend only on their parameters
+    and the seed. Returns None for controllers that should not be cached.
+    """
+    # exact type: a subclass may behave differently for the same genome
+    if type(controller) is DecisionTreeController:
+        return ("DT", tuple(controller.genome))
+    return None
+
+
+def load_episode_cache(path: str = EPISODE_CACHE_PATH) -> None:
+    """Load cached episode results from a previous run, if any and still valid."""
+    if EPISODE_CODE_VERSION is None or not os.path.exists(path):
+        return
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            version = str(data["version"])
+            genomes, seeds, stats = data["genomes"], data["seeds"], data["stats"]
+    except Exception as exc:
+        print(f"[WARN] Ignoring unreadable episode cache {path}: {exc}")
+        return
+    if version != EPISODE_CODE_VERSION:
+        return
+    for genome, seed, row in zip(genomes.tolist(), seeds.tolist(), stats.tolist()):
+        _EP_CACHE[(("DT", tuple(genome)), seed)] = episode_stats_from_row(row)
+
+
+def save_episode_cache(path: str = EPISODE_CACHE_PATH) -> None:
+    """Persist cached episode results for the next run."""
+    if EPISODE_CODE_VERSION is None:
+        return  # unknown episode code version: the results could never be reused
+    entries = list(_EP_CACHE.items())
+    genomes = np.array([genome for ((_, genome), _), _ in entries], dtype=np.int64)
+    genomes = genomes.reshape(len(entries), DecisionTreeController.num_genes())
+    seeds = np.array([seed for (_, seed), _ in entries], dtype=np.int64)
+    stats = np.array([result for _, result in entries], dtype=np.int64).reshape(-1, 9)
+    with open(path, "wb") as f:
+        np.savez(f, version=np.array(EPISODE_CODE_VERSION), genomes=genomes, seeds=seeds, stats=stats)
+
+
 def compute_floor_score_from_stats(
     steps: int,
     damage_taken: int,
@@ -75,34 +134,65 @@ class Summary:
     avg_coins_all: float
 
 
+def _run_one(controller, seed: int) -> Tuple:
+    """Worker entry point: one floor for one seed."""
+    return run_episode(controller, seed=seed)
+
+
+def run_floors(controller, seeds: Sequence[int], pool: Optional[PoolType] = None) -> List[Tuple]:
+    """
+    run_episode results for each seed, in seed order.
+
+    Cached floors are reused; the rest run in `pool` when one is given
+    (each floor is an independent episode seeded by its own seed, so the
+    results match a serial run) and serially otherwise.
+    """
+    cache_key = _controller_cache_key(controller)
+    if cache_key is None:
+        missing = list(seeds)
+    else:
+        missing = [seed for seed in seeds if (cache_key, seed) not in _EP_CACHE]
+
+    if pool is not None and len(missing) > 1:
+        fresh = pool.map(partial(_run_one, controller), missing)
+    else:
+        fresh = [run_episode(controller, seed=seed) for seed in missing]
+
+    if cache_key is None:
+        return fresh
+
+    for seed, result in zip(missing, fresh):
+        _EP_CACHE[(cache_key, seed)] = result
+    return [_EP_CACHE[(cache_key, seed)] for seed in seeds]
+
+
 def simulate_controller(
     controller,
     name: str,
     num_floors: int = 200,
     seed_base: int = 0,
+    pool: Optional[PoolType] = None,
 ) -> Summary:
     """
     Runs the controller through num_floors randomized dungeons.
     Uses deterministic seeds so each controller sees the same sequence.
+    Pass a multiprocessing pool to spread the floors across processes.
     """
-    scores_all: List[float] = []
-    scores_success: List[float] = []
-
-    steps_success: List[int] = []
+    scores_all = np.zeros(num_floors, dtype=np.float64)
+    steps = np.zeros(num_floors, dtype=np.int32)
+    success = np.zeros(num_floors, dtype=bool)
 
-    damages: List[int] = []
-    kills: List[int] = []
-    potions: List[int] = []
-    coins: List[int] = []
+    damages = np.empty(num_floors, dtype=np.int32)
+    kills = np.empty(num_floors, dtype=np.int32)
+    potions = np.empty(num_floors, dtype=np.int32)
+    coins = np.empty(num_floors, dtype=np.int32)
 
-    successes = 0
-
-    for i in range(num_floors):
-        seed = seed_base + i
+    results = run_floors(controller, range(seed_base, seed_base + num_floors), pool)
 
+    for i, result in enumerate(results):
         (
             reached_exit,
-            steps,
+            steps_taken,
             damage_taken,
             monsters_killed,
             potions_collected,
@@ -110,47 +200,38 @@ def simulate_controller(
             _initial_dist,
             _final_dist,
             _best_dist,
-        ) = run_episode(controller, seed=seed)
+        ) = result
 
         # Track raw stats
-        damages.append(damage_taken)
-        kills.append(monsters_killed)
-        potions.append(potions_collected)
-        coins.append(coins_collected)
+        damages[i] = damage_taken
+        kills[i] = monsters_killed
+        potions[i] = potions_collected
+        coins[i] = coins_collected
 
         # "Floor score" is defined in main only when you reach the exit.
         # For comparison across many floors, we report:
         # 1) avg_score_all where failures count as 0
         # 2) avg_score_success_only for successful floors
         if reached_exit:
-            successes += 1
-            score = compute_floor_score_from_stats(
-                steps, damage_taken, monsters_killed, potions_collected, coins_collected
+            success[i] = True
+            steps[i] = steps_taken
+            scores_all[i] = compute_floor_score_from_stats(
+                steps_taken, damage_taken, monsters_killed, potions_collected, coins_collected
             )
-            scores_all.append(score)
-            scores_success.append(score)
-            steps_success.append(steps)
-        else:
-            scores_all.append(0.0)
-
-    success_rate = successes / float(num_floors)
 
-    avg_score_all = statistics.mean(scores_all) if scores_all else 0.0
-    avg_score_success_only = (
-        statistics.mean(scores_success) if scores_success else 0.0
-    )
-    avg_steps_success = statistics.mean(steps_success) if steps_success else float("inf")
+    successes = int(success.sum())
+    success_rate = successes / float(num_floors) if num_floors else 0.0
 
     return Summary(
         name=name,
-        avg_score_all=avg_score_all,
-        avg_score_success_only=avg_score_success_only,
+        avg_score_all=float(scores_all.mean()) if num_floors else 0.0,
+        avg_score_success_only=float(scores_all[success].mean()) if successes else 0.0,
         success_rate=success_rate,
-        avg_steps_success=avg_steps_success,
-        avg_damage_all=statistics.mean(damages) if damages else 0.0,
-        avg_monsters_all=statistics.mean(kills) if kills else 0.0,
-        avg_potions_all=statistics.mean(potions) if potions else 0.0,
-        avg_coins_all=statistics.mean(coins) if coins else 0.0,
+        avg_steps_success=float(steps[success].mean()) if successes else float("inf"),
+        avg_damage_all=float(damages.mean()) if num_floors else 0.0,
+        avg_monsters_all=float(kills.mean()) if num_floors else 0.0,
+        avg_potions_all=float(potions.mean()) if num_floors else 0.0,
+        avg_coins_all=float(coins.mean()) if num_floors else 0.0,
     )
 
 
@@ -237,9 +318,16 @@ def main() -> None:
     summaries: List[Summary] = []
     num_floors = 200
 
+    load_episode_cache()
+
     # Use the same seeds across all controllers for fairness
-    for name, ctrl in controllers_to_test:
-        summaries.append(simulate_controller(ctrl, name=name, num_floors=num_floors, seed_base=0))
+    with Pool() as pool:
+        for name, ctrl in controllers_to_test:
+            summaries.append(
+                simulate_controller(ctrl, name=name, num_floors=num_floors, seed_base=0, pool=pool)
+            )
+
+    save_episode_cache()
 
     # Sort by avg_score_all descending for a nice readout
     summaries.sort(key=lambda s: s.avg_score_all, reverse=True)
@@ -5,7 +5,7 @@ Defines several controller classes that map dungeon state to Actions:
 
     - BaseController:
         Abstract interface – all controllers implement select_action() and
-        reset_episode().
+        reset_episode(); start_episode(dungeon) is the per-floor entry point.
 
     - RandomWalkerController:
         Very simple baseline that chooses random *valid* movement actions while
@@ -21,10 +21,32 @@ These controllers are used by:
     - main.py for interactive visualization of learned policies.
 """
 import random
-from typing import List, Sequence, Tuple
+from collections import deque
+from typing import ClassVar, Deque, List, Optional, Sequence, Tuple
 
-from agent import Action, Agent
-from dungeon import Dungeon, TileType
+import numpy as np
+
+from agent import ACTION_DELTA, Action, Agent
+from dungeon import Dungeon, WALL_CODE, MONSTER_MELEE_CODE, MONSTER_MAGIC_CODE
+from fast_ops import state_index
+
+
+# DecisionTreeController._exit_pos before the floor's exit is known
+_NO_EXIT: Tuple[int, int] = (-1, -1)
+
+# starting "best" distance for move scans, above any Manhattan distance on a floor
+_NO_DIST = 1 << 30
+
+# movement actions in Dungeon.walkable_mask_at order (up, down, left, right)
+_MASK_MOVES: Tuple[Action, ...] = (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT)
+_MASK_DELTAS: Tuple[Tuple[int, int], ...] = ((0, -1), (0, 1), (-1, 0), (1, 0))
+# where each of _MASK_MOVES' target tiles sits in Dungeon.cross_codes (left, right, up, down, here)
+_MASK_CROSS_SLOTS: Tuple[int, ...] = (2, 3, 0, 1)
+
+# 4-bit move mask (bit i set = _MASK_MOVES[i] allowed) -> those moves, in _MASK_MOVES order
+_VALID_MOVES_BY_MASK: Tuple[Tuple[Action, ...], ...] = tuple(
+    tuple(move for i, move in enumerate(_MASK_MOVES) if mask >> i & 1) for mask in range(16)
+)
 
 
 class BaseController:
@@ -40,6 +62,8 @@ class BaseController:
     hill-climber controllers uniformly.
     """
 
+    __slots__ = ()
+
     def select_action(self, agent: Agent, dungeon: Dungeon) -> Action:
         raise NotImplementedError
 
@@ -47,6 +71,14 @@ class BaseController:
         """reset internal state"""
         pass
 
+    def start_episode(self, dungeon: Dungeon) -> None:
+        """Called once per floor before the first select_action.
+
+        Resets internal state; subclasses may also cache per-floor constants
+        of the dungeon (e.g. the exit position) here.
+        """
+        self.reset_episode()
+
 
 class RandomWalkerController(BaseController):
     """Baseline controller that walks randomly but avoids walls.
@@ -59,25 +91,11 @@ class RandomWalkerController(BaseController):
         This baseline is useful for sanity checks and comparative evaluation.
         """
 
+    __slots__ = ()
+
     def select_action(self, agent: Agent, dungeon: Dungeon) -> Action:
-        candidate_actions = [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]
-        valid_actions = []
-
-        for action in candidate_actions:
-            dx, dy = 0, 0
-            if action == Action.UP:
-                dy = -1
-            elif action == Action.DOWN:
-                dy = 1
-            elif action == Action.LEFT:
-                dx = -1
-            elif action == Action.RIGHT:
-                dx = 1
-
-            new_x = agent.x + dx
-            new_y = agent.y + dy
-            if dungeon.is_walkable(new_x, new_y):
-                valid_actions.append(action)
+        up, down, left, right = dungeon.walkable_mask_at(agent.x, agent.y)
+        valid_actions = _VALID_MOVES_BY_MASK[up + 2 * down + 4 * left + 8 * right]
 
         if not valid_actions:
             return Action.STAY
@@ -99,7 +117,9 @@ class DecisionTreeController(BaseController):
     Genome: length-288 list of action indices into ACTIONS
     """
 
-    ACTIONS: List[Action] = [
+    __slots__ = ("genome", "_action_table", "_action_codes", "prev_positions", "_exit_pos", "_step_codes")
+
+    ACTIONS: ClassVar[List[Action]] = [
         Action.UP,
         Action.DOWN,
         Action.LEFT,
@@ -122,197 +142,109 @@ class DecisionTreeController(BaseController):
     @classmethod
     def random_genome(cls) -> List[int]:
         """Create a random genome over the expanded action set"""
-        return [random.randint(0, cls.num_actions() - 1) for _ in range(cls.num_genes())]
+        randint = random.randint
+        top = cls.num_actions() - 1
+        return [randint(0, top) for _ in range(cls.num_genes())]
 
     def __init__(self, genome: Sequence[int]):
+        self.set_genome(genome)
+
+        # mem for loops
+        self.prev_positions: Deque[Tuple[int, int]] = deque(maxlen=8)
+
+        # exit position of the current floor, cached by start_episode
+        self._exit_pos: Tuple[int, int] = _NO_EXIT
+
+        # this step's dungeon.cross_codes, read lazily by _cross_codes
+        self._step_codes: Optional[Tuple[int, int, int, int, int]] = None
+
+
+    def set_genome(self, genome: Sequence[int]) -> None:
+        """Assign a genome and rebuild the state -> Action table derived from it"""
         genome = list(genome)
         if len(genome) != self.num_genes():
             raise ValueError(f"DecisionTreeController genome must have length {self.num_genes()}, got {len(genome)}")
         self.genome: List[int] = genome
 
-        # mem for loops
-        self.prev_positions: List[Tuple[int, int]] = []
-
+        # genome is a private copy, so this table can't go stale behind our back;
+        # anything that edits self.genome in place must call set_genome again
+        n = self.num_actions()
+        self._action_table: Tuple[Action, ...] = tuple(self.ACTIONS[g % n] for g in genome)
+        # the same table as an int8 array, for the compiled episode (fast_ops.decision_tree_episode)
+        self._action_codes: np.ndarray = np.array(self._action_table, dtype=np.int8)
 
     def reset_episode(self) -> None:
         self.prev_positions.clear()
+        self._exit_pos = _NO_EXIT
+
+    def start_episode(self, dungeon: Dungeon) -> None:
+        self.reset_episode()
+        self._exit_pos = dungeon.exit_pos
 
 
-    def _get_enemy_adj_type(self, agent: Agent, dungeon: Dungeon) -> int:
+    def _state_index(self, x: int, y: int, mana: int, dungeon: Dungeon) -> int:
         """
-        Return:
-            0 = no adj monsters
-            1 = meleeweak monsters only
-            2 = magicweak monsters only
-            3 = both types adj
+        Genome index for the agent's current situation:
+        ((((exit * 4 + enemy) * 2 + potion) * 2 + coin) * 2 + has_mana) * 2 + front_blocked
+
+        exit is the 0 to 8 exit sector, enemy is 0 none / 1 meleeweak / 2 magicweak /
+        3 both adj, and front_blocked looks one step along the axis that closes most
+        distance to the exit. Computed by fast_ops.state_index in one pass.
         """
-        has_melee = False
-        has_magic = False
-
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            x, y = agent.x + dx, agent.y + dy
-            if dungeon.in_bounds(x, y):
-                tile = dungeon.get_tile(x, y)
-                if tile == TileType.MONSTER_MELEE:
-                    has_melee = True
-                elif tile == TileType.MONSTER_MAGIC:
-                    has_magic = True
-
-        if has_melee and has_magic:
-            return 3
-        if has_melee:
-            return 1
-        if has_magic:
-            return 2
-        return 0
-
-    def _has_adjacent_potion(self, agent: Agent, dungeon: Dungeon) -> int:
-        """Return 1 if any adj cell has a potion else 0."""
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            x, y = agent.x + dx, agent.y + dy
-            if dungeon.in_bounds(x, y):
-                tile = dungeon.get_tile(x, y)
-                if tile in (TileType.HEALTH_POTION, TileType.MANA_POTION):
-                    return 1
-        return 0
-
-    def _exit_sector(self, agent: Agent, dungeon: Dungeon) -> int:
-        """Return 0 to 8 encoding (sign(dx), sign(dy))"""
-        exit_x, exit_y = dungeon.exit_pos
-        dx = exit_x - agent.x
-        dy = exit_y - agent.y
-
-        def sign(v: int) -> int:
-            if v < 0:
-                return -1
-            elif v > 0:
-                return 1
-            return 0
-
-        sx = sign(dx)  # -1, 0, 1
-        sy = sign(dy)  # -1, 0, 1
-        return (sx + 1) * 3 + (sy + 1)  # 0..8
-
-    def _front_blocked(self, agent: Agent, dungeon: Dungeon) -> int:
+        exit_x, exit_y = self._exit_pos
+        return state_index(dungeon.padded, x, y, exit_x, exit_y, mana)
+
+    def _cross_codes(self, x: int, y: int, dungeon: Dungeon) -> Tuple[int, int, int, int, int]:
         """
-        get a front direction that minmizes distance to the exit
-        then check if that tile is walkable If it's blocked
-        return 1; else 0
+        dungeon.cross_codes(x, y), read at most once per select_action.
+        _sanitize_action, _best_walkable_move and _explore_move all need this neighbourhood,
+        for monster codes and for walkability (code != WALL)
         """
-        exit_x, exit_y = dungeon.exit_pos
-        dx = exit_x - agent.x
-        dy = exit_y - agent.y
-
-        # Already at exit so front doesn't really matter
-        if dx == 0 and dy == 0:
-            return 0
-
-        # Choose axis with larger |delta| as "front"
-        if abs(dx) >= abs(dy) and dx != 0:
-            step = (1, 0) if dx > 0 else (-1, 0)
-        else:
-            step = (0, 1) if dy > 0 else (0, -1)
-
-        fx = agent.x + step[0]
-        fy = agent.y + step[1]
-
-        if not dungeon.is_walkable(fx, fy):
-            return 1
-        return 0
-
-    def _state_index(self, agent: Agent, dungeon: Dungeon) -> int:
-        exit_index = self._exit_sector(agent, dungeon)              # 0 to 8
-        enemy_type = self._get_enemy_adj_type(agent, dungeon)       # 0 ti 3
-        potion_adj = self._has_adjacent_potion(agent, dungeon)      # 0/1
-        has_mana = 1 if agent.mana > 0 else 0                       # 0/1
-        front_blocked = self._front_blocked(agent, dungeon)         # 0/1
-        coin_adj = self._has_adjacent_coin(agent, dungeon)          # 0/1
-
-        # ((((exit * 4 + enemy) * 2 + potion) * 2(coin_adj) * 2 + has_mana) * 2 + front_blocked)
-
-        idx = exit_index
-        idx = idx * 4 + enemy_type
-        idx = idx * 2 + potion_adj
-        idx = idx * 2 + coin_adj
-        idx = idx * 2 + has_mana
-        idx = idx * 2 + front_blocked
-        return idx
-
-    @staticmethod
-    def _manhattan_to_exit(x: int, y: int, dungeon: Dungeon) -> int:
-        ex, ey = dungeon.exit_pos
-        return abs(ex - x) + abs(ey - y)
-
-    def _has_adjacent_monster_type(self, agent: Agent, dungeon: Dungeon, monster_type: TileType) -> bool:
-        """True if any monster of given type exists adj or next to"""
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            x, y = agent.x + dx, agent.y + dy
-            if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == monster_type:
-                return True
-        return False
-
-    def _has_adjacent_coin(self, agent: Agent, dungeon: Dungeon) -> int:
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            x, y = agent.x + dx, agent.y + dy
-            if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == TileType.COIN:
-                return 1
-        return 0
-
-    def _best_walkable_move(self, agent: Agent, dungeon: Dungeon) -> Action:
+        codes = self._step_codes
+        if codes is None:
+            codes = self._step_codes = dungeon.cross_codes(x, y)
+        return codes
+
+    def _best_walkable_move(self, x: int, y: int, dungeon: Dungeon) -> Action:
         """
-        Choose move that minimizes distance to exit
+        Choose move from (x, y) that minimizes distance to exit
         """
-        candidates: List[Tuple[Action, int]] = []
-        for move in (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT):
-            dx, dy = 0, 0
-            if move == Action.UP:
-                dy = -1
-            elif move == Action.DOWN:
-                dy = 1
-            elif move == Action.LEFT:
-                dx = -1
-            elif move == Action.RIGHT:
-                dx = 1
-            nx = agent.x + dx
-            ny = agent.y + dy
-            if dungeon.is_walkable(nx, ny):
-                dist = self._manhattan_to_exit(nx, ny, dungeon)
-                candidates.append((move, dist))
-
-        if not candidates:
+        # one pass over the 4 moves, keeping the tied-nearest ones as a bit mask
+        # (bit i = _MASK_MOVES[i]) so the pick is one index into a shared tuple
+        codes = self._cross_codes(x, y, dungeon)
+        ex, ey = self._exit_pos
+        best_dist = _NO_DIST
+        best_mask = 0
+        for bit, ((dx, dy), slot) in enumerate(zip(_MASK_DELTAS, _MASK_CROSS_SLOTS)):
+            if codes[slot] != WALL_CODE:
+                dist = abs(ex - x - dx) + abs(ey - y - dy)
+                if dist < best_dist:
+                    best_dist = dist
+                    best_mask = 1 << bit
+                elif dist == best_dist:
+                    best_mask |= 1 << bit
+
+        if not best_mask:
             return Action.STAY
+        return random.choice(_VALID_MOVES_BY_MASK[best_mask])
 
-        min_dist = min(d for _, d in candidates)
-        best = [a for a, d in candidates if d == min_dist]
-        return random.choice(best)
-
-    def _fix_blocked_move(self, agent: Agent, dungeon: Dungeon, action: Action) -> Action:
+    def _fix_blocked_move(self, x: int, y: int, dungeon: Dungeon, action: Action) -> Action:
         """
         If the action is a move into a wall pick another walkable
         movement action that gives the smallest Manhattan dist to exit
         """
-        if action not in (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT):
+        delta = ACTION_DELTA[action]
+        if delta is None:
             return action
+        # STAY's (0, 0) probes the agent's own tile, which is always walkable
 
-        dx, dy = 0, 0
-        if action == Action.UP:
-            dy = -1
-        elif action == Action.DOWN:
-            dy = 1
-        elif action == Action.LEFT:
-            dx = -1
-        elif action == Action.RIGHT:
-            dx = 1
-
-        new_x = agent.x + dx
-        new_y = agent.y + dy
-
-        if dungeon.is_walkable(new_x, new_y):
+        dx, dy = delta
+        if dungeon.walkable[y + dy + 1, x + dx + 1]:
             return action
 
-        return self._best_walkable_move(agent, dungeon)
+        return self._best_walkable_move(x, y, dungeon)
 
-    def _sanitize_action(self, agent: Agent, dungeon: Dungeon, action: Action) -> Action:
+    def _sanitize_action(self, agent: Agent, x: int, y: int, dungeon: Dungeon, action: Action) -> Action:
         """
         Make obviously bad actions more sensible without changing genome
           - Avoid spamming DRINK when no potion / already full
@@ -323,106 +255,94 @@ class DecisionTreeController(BaseController):
         # 1) Drinking health when we have no potions or are full move instead
         if action == Action.DRINK_HEALTH:
             if agent.health_potions <= 0 or agent.health >= agent.max_health:
-                return self._best_walkable_move(agent, dungeon)
+                return self._best_walkable_move(x, y, dungeon)
             return action
 
         if action == Action.DRINK_MANA:
             if agent.mana_potions <= 0 or agent.mana >= agent.max_mana:
-                return self._best_walkable_move(agent, dungeon)
+                return self._best_walkable_move(x, y, dungeon)
             return action
 
         if action == Action.MAGIC_BLAST:
             if agent.mana <= 0:
                 if agent.mana_potions > 0 and agent.mana < agent.max_mana:
                     return Action.DRINK_MANA
-                return self._best_walkable_move(agent, dungeon)
+                return self._best_walkable_move(x, y, dungeon)
 
-            if not self._has_adjacent_monster_type(agent, dungeon, TileType.MONSTER_MAGIC):
-                if self._has_adjacent_monster_type(agent, dungeon, TileType.MONSTER_MELEE):
+            codes = self._cross_codes(x, y, dungeon)
+            if MONSTER_MAGIC_CODE not in codes:
+                if MONSTER_MELEE_CODE in codes:
                     return Action.MELEE
-                return self._best_walkable_move(agent, dungeon)
+                return self._best_walkable_move(x, y, dungeon)
 
             return action
 
         if action == Action.MELEE:
-            has_melee = self._has_adjacent_monster_type(agent, dungeon, TileType.MONSTER_MELEE)
-            has_magic = self._has_adjacent_monster_type(agent, dungeon, TileType.MONSTER_MAGIC)
-
-            if has_melee:
+            codes = self._cross_codes(x, y, dungeon)
+            if MONSTER_MELEE_CODE in codes:
                 return action
 
-            if has_magic:
+            if MONSTER_MAGIC_CODE in codes:
                 if agent.mana > 0:
                     return Action.MAGIC_BLAST
                 if agent.mana_potions > 0 and agent.mana < agent.max_mana:
                     return Action.DRINK_MANA
-                return self._best_walkable_move(agent, dungeon)
+                return self._best_walkable_move(x, y, dungeon)
 
-            return self._best_walkable_move(agent, dungeon)
+            return self._best_walkable_move(x, y, dungeon)
 
         return action
 
-    def _explore_move(self, agent: Agent, dungeon: Dungeon, avoid: Action) -> Action:
+    def _explore_move(self, x: int, y: int, dungeon: Dungeon, avoid: Action) -> Action:
         """
-        choose different movement if stuck
+        choose different movement from (x, y) if stuck
         """
-        moves = [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]
-        candidates: List[Action] = []
-
-        for move in moves:
-            if move == avoid:
-                continue
-            dx, dy = 0, 0
-            if move == Action.UP:
-                dy = -1
-            elif move == Action.DOWN:
-                dy = 1
-            elif move == Action.LEFT:
-                dx = -1
-            elif move == Action.RIGHT:
-                dx = 1
-            nx = agent.x + dx
-            ny = agent.y + dy
-            if dungeon.is_walkable(nx, ny):
-                candidates.append(move)
-
-        if candidates:
-            return random.choice(candidates)
+        codes = self._cross_codes(x, y, dungeon)
+        mask = 0
+        for bit, slot in enumerate(_MASK_CROSS_SLOTS):
+            if codes[slot] != WALL_CODE:
+                mask |= 1 << bit
+        mask &= ~(1 << avoid)  # avoid is a move, so its bit is its Action value
+
+        if mask:
+            return random.choice(_VALID_MOVES_BY_MASK[mask])
         return avoid
 
     def _is_stuck_loop(self) -> bool:
         """
         movement loop detector
         """
-        if len(self.prev_positions) < 3:
-            return False
-        if self.prev_positions[-1] == self.prev_positions[-3]:
-            return True
-        if len(self.prev_positions) >= 4:
-            a, b, c, d = self.prev_positions[-4:]
-            if a == c and b == d:
-                return True
-        return False
+        # back on the tile from two steps ago; this also covers the A-B-A-B
+        # oscillation, whose last and third-to-last positions are both B
+        positions = self.prev_positions
+        return len(positions) >= 3 and positions[-1] == positions[-3]
 
 
     def select_action(self, agent: Agent, dungeon: Dungeon) -> Action:
-        self.prev_positions.append(agent.pos)
-        if len(self.prev_positions) > 8:
-            self.prev_positions.pop(0)
+        if self._exit_pos[0] < 0:
+            # start_episode wasn't called for this floor
+            self._exit_pos = dungeon.exit_pos
+
+        # snapshot the position once; every helper below works from these ints
+        x, y = agent.x, agent.y
+        self._step_codes = None
+
+        self.prev_positions.append((x, y))  # deque(maxlen=8) evicts the oldest
 
         stuck = self._is_stuck_loop()
 
-        idx = self._state_index(agent, dungeon)
-        gene_value = self.genome[idx] % self.num_actions()
-        action = self.ACTIONS[gene_value]
+        action = self._action_table[self._state_index(x, y, agent.mana, dungeon)]
 
-        action = self._sanitize_action(agent, dungeon, action)
+        # the table only holds ACTIONS, whose moves (UP..RIGHT) pass through
+        # _sanitize_action unchanged; only combat/drink genes need the live checks
+        if action > Action.RIGHT:
+            action = self._sanitize_action(agent, x, y, dungeon, action)
         # avoid wall
-        action = self._fix_blocked_move(agent, dungeon, action)
+        action = self._fix_blocked_move(x, y, dungeon, action)
 
         # if looping force a diff move
-        if stuck and action in (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT):
-            action = self._explore_move(agent, dungeon, avoid=action)
+        if stuck and action in _MASK_MOVES:
+            action = self._explore_move(x, y, dungeon, avoid=action)
 
         return action
 
@@ -0,0 +1,489 @@
+"""
+fast_ops.py
+
+Small numeric kernels used on the per-step hot paths of training.
+
+Every function here takes plain ints and uint8 Dungeon.padded code grids
+(plus int arrays for the batched and hill-climbing kernels), so it can be compiled
+with Numba's @njit when Numba is installed. Numba is optional: without it
+the kernels run as ordinary Python functions with identical results.
+
+exit_sector, state_index and position_score are the only implementation of
+what they compute (the controllers call them). The decision-tree episode
+kernels instead re-implement Python game rules, so a change to any of these
+has to be made on both sides:
+    - decision_tree_episode: training._play_python_episode, with
+      DecisionTreeController.select_action (_sanitize_action,
+      _fix_blocked_move, _is_stuck_loop, _explore_move) choosing each action,
+      and Agent.step (moves, _pickup_tile, melee_attack / magic_blast,
+      potions) plus Dungeon.apply_monster_damage applying it
+    - _best_walkable_move: DecisionTreeController._best_walkable_move
+    - _kill_adjacent: Agent._kill_adjacent
+    - _random_below / _choose_move: CPython's random.Random._randbelow and
+      random.choice, replayed on getrandbits(32) words
+    - decision_tree_episodes: decision_tree_episode once per row, no rules
+      of its own
+tests/test_compiled_episodes.py checks the kernels against the Python loop.
+"""
+import numpy as np
+
+from dungeon import (
+    WALL_CODE,
+    MONSTER_MELEE_CODE,
+    MONSTER_MAGIC_CODE,
+    HEALTH_POTION_CODE,
+    MANA_POTION_CODE,
+    COIN_CODE,
+    EMPTY_CODE,
+)
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - numba is an optional speedup
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):  # type: ignore[no-redef]
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def exit_sector(ax: int, ay: int, ex: int, ey: int) -> int:
+    """Return 0 to 8 encoding (sign(ex - ax), sign(ey - ay))"""
+    dx = ex - ax
+    dy = ey - ay
+    sx = (dx > 0) - (dx < 0)  # -1, 0, 1
+    sy = (dy > 0) - (dy < 0)  # -1, 0, 1
+    return (sx + 1) * 3 + (sy + 1)
+
+
+@njit(cache=True)
+def state_index(padded, ax: int, ay: int, ex: int, ey: int, mana: int) -> int:
+    """
+    DecisionTreeController feature-state index for an agent at (ax, ay).
+
+    padded is Dungeon.padded (WALL-bordered codes, so (x, y) lives at
+    padded[y + 1, x + 1]). Packs, most to least significant:
+        exit sector (0..8), adjacent enemy type (0..3), potion adjacent,
+        coin adjacent, has mana, front (toward exit) blocked
+    """
+    px = ax + 1
+    py = ay + 1
+
+    has_melee = 0
+    has_magic = 0
+    potion_adj = 0
+    coin_adj = 0
+    for code in (padded[py, px - 1], padded[py, px + 1], padded[py - 1, px], padded[py + 1, px], padded[py, px]):
+        if code == MONSTER_MELEE_CODE:
+            has_melee = 1
+        elif code == MONSTER_MAGIC_CODE:
+            has_magic = 1
+        elif code == HEALTH_POTION_CODE or code == MANA_POTION_CODE:
+            potion_adj = 1
+        elif code == COIN_CODE:
+            coin_adj = 1
+    enemy_type = has_melee + 2 * has_magic  # 0 none, 1 melee, 2 magic, 3 both
+
+    # front = one step along the axis with the larger |delta| toward the exit
+    # (x wins ties). Selected arithmetically, not by branching: at the exit both
+    # steps are 0, so the probe lands on the agent's own tile, which is never WALL
+    dx = ex - ax
+    dy = ey - ay
+    horizontal = int(abs(dx) >= abs(dy) and dx != 0)
+    fx = px + ((dx > 0) - (dx < 0)) * horizontal
+    fy = py + ((dy > 0) - (dy < 0)) * (1 - horizontal)
+    front_blocked = int(padded[fy, fx] == WALL_CODE)
+
+    has_mana = 1 if mana > 0 else 0
+
+    idx = exit_sector(ax, ay, ex, ey)
+    idx = idx * 4 + enemy_type
+    idx = idx * 2 + potion_adj
+    idx = idx * 2 + coin_adj
+    idx = idx * 2 + has_mana
+    idx = idx * 2 + front_blocked
+    return idx
+
+
+@njit(cache=True)
+def position_score(padded, dist_to_exit, monster_xs, monster_ys, x: int, y: int,
+                   unvisited: bool, recent: bool, low_health: bool) -> float:
+    """
+    HillClimbingHandmadeController's heuristic for standing on (x, y); higher is better.
+
+    padded is Dungeon.padded, dist_to_exit the (height, width) walking distance
+    to the exit, monster_xs / monster_ys int arrays of this turn's monster tiles.
+    unvisited / recent / low_health are the controller's memory and health checks.
+    Walls score -inf.
+    """
+    px = x + 1
+    py = y + 1
+    tile = padded[py, px]
+    if tile == WALL_CODE:
+        return -np.inf
+
+    score = 0.0
+
+    # 1. walking distance to exit (closer is better)
+    score -= dist_to_exit[y, x] * 2.0
+
+    # 2. item on the tile
+    if tile == HEALTH_POTION_CODE:
+        score += 50
+    elif tile == MANA_POTION_CODE:
+        score += 40
+    elif tile == COIN_CODE:
+        score += 30
+
+    left = padded[py, px - 1]
+    right = padded[py, px + 1]
+    up = padded[py - 1, px]
+    down = padded[py + 1, px]
+
+    # 3. adjacent items (collectable next turn)
+    for code in (left, right, up, down):
+        if code == HEALTH_POTION_CODE:
+            score += 25
+        elif code == MANA_POTION_CODE:
+            score += 20
+        elif code == COIN_CODE:
+            score += 15
+
+    # 4. monsters next to (or on) the tile
+    monster_penalty = 0
+    for code in (left, right, up, down, tile):
+        if code == MONSTER_MELEE_CODE:
+            monster_penalty += 30
+        elif code == MONSTER_MAGIC_CODE:
+            monster_penalty += 25
+    score -= monster_penalty
+
+    # 5. exploration bonus, 6. backtracking penalty
+    if unvisited:
+        score += 10
+    if recent:
+        score -= 5
+
+    # 7. prefer being farther from monsters on average, and
+    # 8. when low on health, from the closest one
+    monster_count = monster_xs.shape[0]
+    monster_dist_sum = 0
+    closest_monster_dist = 1 << 30
+    for i in range(monster_count):
+        dist = abs(monster_xs[i] - x) + abs(monster_ys[i] - y)
+        monster_dist_sum += dist
+        if dist < closest_monster_dist:
+            closest_monster_dist = dist
+    if monster_count > 0:
+        score += monster_dist_sum / monster_count * 0.5
+    if low_health and closest_monster_dist < 3:
+        score += closest_monster_dist * 5
+
+    return score
+
+
+# agent.Action values (agent.py imports pygame, so they are repeated here)
+_UP, _DOWN, _LEFT, _RIGHT, _STAY, _MELEE, _MAGIC_BLAST, _DRINK_HEALTH, _DRINK_MANA = range(9)
+
+
+@njit(cache=True)
+def _random_below(n: int, words, used: int):
+    """
+    random.Random._randbelow(n) replayed on pre-drawn getrandbits(32) words:
+    getrandbits(k) is the next word's top k bits, redrawn while >= n.
+    Returns (r, words used so far), or (-1, used) when the words ran out.
+    """
+    k = 0
+    while (n >> k) != 0:
+        k += 1
+    while used < words.shape[0]:
+        r = int(words[used]) >> (32 - k)
+        used += 1
+        if r < n:
+            return r, used
+    return -1, used
+
+
+@njit(cache=True)
+def _choose_move(mask: int, words, used: int):
+    """random.choice over the moves whose bits are set in mask (bit i = move i, UP..RIGHT)"""
+    n = 0
+    for bit in range(4):
+        n += (mask >> bit) & 1
+    r, used = _random_below(n, words, used)
+    if r < 0:
+        return -1, used
+    for bit in range(4):
+        if (mask >> bit) & 1:
+            if r == 0:
+                return bit, used
+            r -= 1
+    return -1, used
+
+
+@njit(cache=True)
+def _best_walkable_move(padded, x: int, y: int, ex: int, ey: int, words, used: int):
+    """DecisionTreeController._best_walkable_move: a random move among the walkable ones nearest the exit"""
+    best_dist = 1 << 30
+    best_mask = 0
+    for bit in range(4):
+        dx = (bit == _RIGHT) - (bit == _LEFT)
+        dy = (bit == _DOWN) - (bit == _UP)
+        if padded[y + 1 + dy, x + 1 + dx] != WALL_CODE:
+            dist = abs(ex - x - dx) + abs(ey - y - dy)
+            if dist < best_dist:
+                best_dist = dist
+                best_mask = 1 << bit
+            elif dist == best_dist:
+                best_mask |= 1 << bit
+    if best_mask == 0:
+        return _STAY, used
+    return _choose_move(best_mask, words, used)
+
+
+@njit(cache=True)
+def _kill_adjacent(padded, walkable, x: int, y: int, monster_code: int) -> int:
+    """Agent._kill_adjacent: clear the first monster_code tile in ATTACK_OFFSETS order; 1 if one died"""
+    px = x + 1
+    py = y + 1
+    for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)):
+        if padded[py + dy, px + dx] == monster_code:
+            padded[py + dy, px + dx] = EMPTY_CODE
+            walkable[py + dy, px + dx] = True
+            return 1
+    return 0
+
+
+@njit(cache=True)
+def decision_tree_episode(padded, walkable, action_table, x: int, y: int, ex: int, ey: int,
+                          health: int, max_health: int, mana: int, max_mana: int,
+                          max_steps: int, words):
+    """
+    training.play_episode for a DecisionTreeController, in one compiled call.
+
+    padded / walkable are the Dungeon's arrays and are updated in place as
+    Agent.step would (pickups, kills). action_table holds the controller's
+    Action per state_index. The controller's random.choice calls consume
+    words, getrandbits(32) outputs drawn from the global random generator
+    beforehand, exactly as the Python path would.
+
+    Returns (stats, words used): stats is play_episode's EpisodeStats as an
+    int64 array, and words used is -1 if the episode needed more words.
+    """
+    stats = np.zeros(9, dtype=np.int64)
+    used = 0
+    health_potions = 0
+    mana_potions = 0
+    damage_taken = 0
+    monsters_killed = 0
+    potions_collected = 0
+    coins_collected = 0
+
+    initial_dist = abs(x - ex) + abs(y - ey)
+    best_dist = initial_dist
+    # the controller's last two positions, for its back-on-the-tile-from-two-steps-ago check
+    prev1_x = prev1_y = prev2_x = prev2_y = -1
+    num_prev = 0
+
+    for step in range(max_steps):
+        # --- DecisionTreeController.select_action ---
+        stuck = num_prev >= 2 and prev2_x == x and prev2_y == y
+        prev2_x, prev2_y = prev1_x, prev1_y
+        prev1_x, prev1_y = x, y
+        num_prev += 1
+
+        px = x + 1
+        py = y + 1
+        left = padded[py, px - 1]
+        right = padded[py, px + 1]
+        up = padded[py - 1, px]
+        down = padded[py + 1, px]
+        here = padded[py, px]
+        melee_adj = (left == MONSTER_MELEE_CODE or right == MONSTER_MELEE_CODE or up == MONSTER_MELEE_CODE
+                     or down == MONSTER_MELEE_CODE or here == MONSTER_MELEE_CODE)
+        magic_adj = (left == MONSTER_MAGIC_CODE or right == MONSTER_MAGIC_CODE or up == MONSTER_MAGIC_CODE
+                     or down == MONSTER_MAGIC_CODE or here == MONSTER_MAGIC_CODE)
+
+        action = int(action_table[state_index(padded, x, y, ex, ey, mana)])
+        best_move = False  # sanitizing sends this step to _best_walkable_move
+        if action == _DRINK_HEALTH:
+            if health_potions <= 0 or health >= max_health:
+                best_move = True
+        elif action == _DRINK_MANA:
+            if mana_potions <= 0 or mana >= max_mana:
+                best_move = True
+        elif action == _MAGIC_BLAST:
+            if mana <= 0:
+                if mana_potions > 0 and mana < max_mana:
+                    action = _DRINK_MANA
+                else:
+                    best_move = True
+            elif not magic_adj:
+                if melee_adj:
+                    action = _MELEE
+                else:
+                    best_move = True
+        elif action == _MELEE:
+            if not melee_adj:
+                if magic_adj and mana > 0:
+                    action = _MAGIC_BLAST
+                elif magic_adj and mana_potions > 0 and mana < max_mana:
+                    action = _DRINK_MANA
+                else:
+                    best_move = True
+
+        if best_move:
+            action, used = _best_walkable_move(padded, x, y, ex, ey, words, used)
+            if action < 0:
+                return stats, -1
+        elif action <= _STAY:
+            # avoid wall
+            dx = (action == _RIGHT) - (action == _LEFT)
+            dy = (action == _DOWN) - (action == _UP)
+            if not walkable[py + dy, px + dx]:
+                action, used = _best_walkable_move(padded, x, y, ex, ey, words, used)
+                if action < 0:
+                    return stats, -1
+
+        # if looping force a diff move
+        if stuck and action <= _RIGHT:
+            mask = 0
+            if up != WALL_CODE:
+                mask |= 1 << _UP
+            if down != WALL_CODE:
+                mask |= 1 << _DOWN
+            if left != WALL_CODE:
+                mask |= 1 << _LEFT
+            if right != WALL_CODE:
+                mask |= 1 << _RIGHT
+            mask &= ~(1 << action)
+            if mask:
+                action, used = _choose_move(mask, words, used)
+                if action < 0:
+                    return stats, -1
+
+        # --- Agent.step ---
+        if action <= _STAY:
+            dx = (action == _RIGHT) - (action == _LEFT)
+            dy = (action == _DOWN) - (action == _UP)
+            if walkable[py + dy, px + dx]:
+                x += dx
+                y += dy
+        elif action == _MELEE:
+            monsters_killed += _kill_adjacent(padded, walkable, x, y, MONSTER_MELEE_CODE)
+        elif action == _MAGIC_BLAST:
+            if mana > 0:
+                mana -= 1
+                monsters_killed += _kill_adjacent(padded, walkable, x, y, MONSTER_MAGIC_CODE)
+        elif action == _DRINK_HEALTH:
+            if health_potions > 0 and health < max_health:
+                health_potions -= 1
+                health = min(max_health, health + 40)
+        elif action == _DRINK_MANA:
+            if mana_potions > 0 and mana < max_mana:
+                mana_potions -= 1
+                mana = max_mana
+
+        # pick up items, then take monster damage
+        px = x + 1
+        py = y + 1
+        code = padded[py, px]
+        if code == HEALTH_POTION_CODE or code == MANA_POTION_CODE or code == COIN_CODE:
+            if code == HEALTH_POTION_CODE:
+                health_potions += 1
+                potions_collected += 1
+            elif code == MANA_POTION_CODE:
+                mana_potions += 1
+                potions_collected += 1
+            else:
+                coins_collected += 1
+            padded[py, px] = EMPTY_CODE
+            walkable[py, px] = True
+
+        damage = 0
+        for code in (padded[py, px - 1], padded[py, px + 1], padded[py - 1, px], padded[py + 1, px], padded[py, px]):
+            if code == MONSTER_MELEE_CODE or code == MONSTER_MAGIC_CODE:
+                damage += 10
+        if damage > 0:
+            health -= damage
+            damage_taken += damage
+
+        # --- play_episode bookkeeping ---
+        current_dist = abs(x - ex) + abs(y - ey)
+        if current_dist < best_dist:
+            best_dist = current_dist
+
+        done = False
+        reached_exit = 0
+        final_dist = current_dist
+        if health <= 0:
+            done = True
+        elif x == ex and y == ey:
+            done = True
+            reached_exit = 1
+            final_dist = 0
+            best_dist = 0
+        if done:
+            stats[0] = reached_exit
+            stats[1] = step + 1
+            stats[2] = damage_taken
+            stats[3] = monsters_killed
+            stats[4] = potions_collected
+            stats[5] = coins_collected
+            stats[6] = initial_dist
+            stats[7] = final_dist
+            stats[8] = best_dist
+            return stats, used
+
+    # timeout
+    stats[0] = 0
+    stats[1] = max_steps
+    stats[2] = damage_taken
+    stats[3] = monsters_killed
+    stats[4] = potions_collected
+    stats[5] = coins_collected
+    stats[6] = initial_dist
+    stats[7] = abs(x - ex) + abs(y - ey)
+    stats[8] = best_dist
+    return stats, used
+
+
+@njit(cache=True)
+def decision_tree_episodes(padded, walkable, action_tables, x: int, y: int, ex: int, ey: int,
+                           health: int, max_health: int, mana: int, max_mana: int,
+                           max_steps: int, words, todo):
+    """
+    decision_tree_episode for the controllers whose action_tables rows are
+    flagged in todo, each on its own copy of the floor (padded / walkable are
+    left untouched) and each replaying words from the start, as if the
+    generator were reseeded before every controller. Only a loop over
+    decision_tree_episode: the episode rules live there alone.
+
+    Returns ((P, 9) stats, (P,) words used); rows not in todo are zeros.
+    """
+    n = action_tables.shape[0]
+    stats = np.zeros((n, 9), dtype=np.int64)
+    used = np.zeros(n, dtype=np.int64)
+    for i in range(n):
+        if todo[i]:
+            stats[i], used[i] = decision_tree_episode(
+                padded.copy(), walkable.copy(), action_tables[i], x, y, ex, ey,
+                health, max_health, mana, max_mana, max_steps, words,
+            )
+    return stats, used
+
+
+# Compile once at import so the first agent step doesn't pay the JIT cost
+exit_sector(0, 0, 0, 0)
+state_index(np.full((3, 3), WALL_CODE, dtype=np.uint8), 0, 0, 0, 0, 0)
+position_score(np.full((3, 3), WALL_CODE, dtype=np.uint8), np.zeros((1, 1), dtype=np.int64),
+               np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), 0, 0, False, False, False)
+decision_tree_episode(np.full((3, 3), WALL_CODE, dtype=np.uint8), np.zeros((3, 3), dtype=np.bool_),
+                      np.zeros(1, dtype=np.int8), 0, 0, 0, 0, 1, 1, 0, 0, 0, np.frombuffer(bytes(4), dtype=np.uint32))
+decision_tree_episodes(np.full((3, 3), WALL_CODE, dtype=np.uint8), np.zeros((3, 3), dtype=np.bool_),
+                       np.zeros((1, 1), dtype=np.int8), 0, 0, 0, 0, 1, 1, 0, 0, 0,
+                       np.frombuffer(bytes(4), dtype=np.uint32), np.ones(1, dtype=np.bool_))
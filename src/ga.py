@@ -7,22 +7,46 @@ The GA operates over genomes that are:
     - Lists of integers, one per discrete state handled by DecisionTreeController.
     - Each gene indexes into the controller's ACTIONS list.
 
+Inside run_ga the population is one (POP_SIZE, num_genes) int8 NumPy array,
+one genome per row, and each generation's children are bred in a single
+vectorized pass (see breed()).
+
 The algorithm uses:
     - Tournament selection
     - Uniform crossover (per-gene 50/50 from each parent)
     - Per-gene mutation (flip to random action with probability MUTATION_RATE)
     - Elitism (keep best ELITE_FRACTION of population each generation)
+    - Fitness evaluation by successive halving (only the better genomes get
+      all EPISODES_PER_EVAL floors, and elites and the best genome are chosen
+      among those), spread over a multiprocessing pool, with
+      per-floor episode stats cached per genome (episodes are deterministic) and
+      saved to FITNESS_CACHE_PATH for the next run
 
 This module is the main entry point for training GA policies:
     - `run_ga()` drives the evolution loop and prints per-generation fitness.
     - The best genome can then be copied into main.py for visualization.
 """
 
-from typing import List, Tuple
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from multiprocessing import Pool
+from multiprocessing.pool import Pool as PoolType
+from typing import Callable, ContextManager, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import os
 import random
 
+import numpy as np
+
 from controllers import DecisionTreeController
-from training import evaluate_controller
+from training import (
+    EPISODE_CODE_VERSION,
+    EpisodeStats,
+    episode_reward,
+    episode_stats_from_row,
+    evaluate_controller,
+    play_controllers,
+)
 
 POP_SIZE = 100
 NUM_GENERATIONS = 60
@@ -30,9 +54,79 @@ MUTATION_RATE = 0.1
 TOURNAMENT_SIZE = 3
 ELITE_FRACTION = 0.1   # keep top 10%
 EPISODES_PER_EVAL = 5
+RACING_FIRST_EPISODES = 2  # episodes every genome gets before the field is halved
+
+
+@dataclass(frozen=True)
+class GAConfig:
+    """GA hyperparameters; the defaults are the module constants above"""
+    pop_size: int = POP_SIZE
+    num_generations: int = NUM_GENERATIONS
+    mutation_rate: float = MUTATION_RATE
+    tournament_size: int = TOURNAMENT_SIZE
+    elite_fraction: float = ELITE_FRACTION
+    episodes_per_eval: int = EPISODES_PER_EVAL
 
 
 Genome = List[int]
+PackedGenome = bytes  # one byte per gene: a population row's tobytes()
+Population = np.ndarray  # (pop_size, num_genes) int8, one genome per row
+
+# genome bytes -> its episode stats on the floors seeded 0, 1, ..., least
+# recently used first. Episodes are deterministic (every one is seeded), so
+# cached stats are exactly what a re-run would return, and a genome that races
+# further later only plays the floors it is missing. Sized for a few full
+# default runs (each adds roughly NUM_GENERATIONS * POP_SIZE genomes), so the
+# saved cache still holds a rerun's genomes instead of thrashing.
+FITNESS_CACHE_SIZE = 4 * NUM_GENERATIONS * POP_SIZE
+_FITNESS_CACHE: "OrderedDict[bytes, List[EpisodeStats]]" = OrderedDict()
+
+# saved between runs by the entry points (load once before their runs, save
+# once after), stamped with the episode code the stats came from. Plain
+# arrays in an .npz (no pickles), least recently used genome first:
+#   version  the EPISODE_CODE_VERSION string
+#   genomes  (N, num_genes) int8, one cached genome per row
+#   counts   (N,) how many floors of stats each genome has
+#   stats    (counts.sum(), 9) int64 EpisodeStats rows, genome by genome
+FITNESS_CACHE_PATH = "ga_fitness_cache.npz"
+_FITNESS_CACHE_ENV = EPISODE_CODE_VERSION
+
+
+def load_fitness_cache(path: str = FITNESS_CACHE_PATH) -> None:
+    """Merge cached episode stats from a previous run, if any and still valid."""
+    if _FITNESS_CACHE_ENV is None or not os.path.exists(path):
+        return
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            env = str(data["version"])
+            genomes, counts, stats = data["genomes"], data["counts"], data["stats"]
+    except Exception as exc:
+        print(f"[WARN] Ignoring unreadable fitness cache {path}: {exc}")
+        return
+    if env != _FITNESS_CACHE_ENV:
+        return
+    rows = stats.tolist()
+    start = 0
+    for genome, count in zip(genomes, counts.tolist()):
+        saved = [episode_stats_from_row(row) for row in rows[start:start + count]]
+        start += count
+        # both are stats prefixes over the same floors; keep the longer one
+        key = genome.astype(np.int8).tobytes()
+        if len(saved) > len(_FITNESS_CACHE.get(key, ())):
+            _FITNESS_CACHE[key] = saved
+
+
+def save_fitness_cache(path: str = FITNESS_CACHE_PATH) -> None:
+    """Persist cached episode stats for the next run."""
+    if _FITNESS_CACHE_ENV is None:
+        return  # unknown episode code version: the stats could never be reused
+    keys = list(_FITNESS_CACHE)
+    genomes = np.frombuffer(b"".join(keys), dtype=np.int8).reshape(len(keys), DecisionTreeController.num_genes())
+    counts = np.array([len(_FITNESS_CACHE[key]) for key in keys], dtype=np.int64)
+    # one 9-field EpisodeStats row per cached floor
+    stats = np.array([row for key in keys for row in _FITNESS_CACHE[key]], dtype=np.int64).reshape(-1, 9)
+    with open(path, "wb") as f:
+        np.savez(f, version=np.array(_FITNESS_CACHE_ENV), genomes=genomes, counts=counts, stats=stats)
 
 
 def make_random_genome() -> Genome:
@@ -46,41 +140,217 @@ def evaluate_genome(genome: Genome) -> float:
     return evaluate_controller(controller, num_episodes=EPISODES_PER_EVAL)
 
 
-def tournament_select(pop: List[Genome], fitnesses: List[float]) -> Genome:
-    """tournament selection"""
-    best_idx = None
-    for _ in range(TOURNAMENT_SIZE):
-        idx = random.randrange(len(pop))
-        if best_idx is None or fitnesses[idx] > fitnesses[best_idx]:
-            best_idx = idx
-    return pop[best_idx]
-
-
-def crossover(parent1: Genome, parent2: Genome) -> Genome:
-    """50 50 crossover"""
-    child: Genome = []
-    for g1, g2 in zip(parent1, parent2):
-        child.append(g1 if random.random() < 0.5 else g2)
-    return child
-
-
-def mutate(genome: Genome) -> Genome:
-    """per gene mutation"""
-    num_actions = DecisionTreeController.num_actions()
-    for i in range(len(genome)):
-        if random.random() < MUTATION_RATE:
-            genome[i] = random.randint(0, num_actions - 1)
-    return genome
-
-
-def run_ga(seed: int = 0) -> Tuple[Genome, float]:
+def evaluate_genomes(
+    genomes: Sequence[PackedGenome], first_episode: int, num_episodes: int
+) -> List[List[EpisodeStats]]:
+    """
+    Per-episode stats of a batch of genomes on floors first_episode ..
+    first_episode + num_episodes - 1, sharing each seeded floor across the batch
+    """
+    controllers = [DecisionTreeController(g) for g in genomes]
+    return play_controllers(controllers, num_episodes=num_episodes, first_episode=first_episode)
+
+
+def _total_reward(stats: Iterable[EpisodeStats]) -> float:
+    """Sum of episode_reward over episodes"""
+    return sum(map(episode_reward, stats))
+
+
+def _extend_stats(genomes: Iterable[PackedGenome], num_episodes: int, pool: Optional[PoolType]) -> None:
+    """Play genomes until each has num_episodes cached episode stats"""
+    cache = _FITNESS_CACHE
+    # group by how many floors each genome already has, so a batch shares its floors;
+    # the cache keys are the packed genomes themselves, so they go to workers as is
+    by_have: Dict[int, List[PackedGenome]] = {}
+    for key in genomes:
+        have = len(cache.setdefault(key, []))
+        if have < num_episodes:
+            by_have.setdefault(have, []).append(key)
+    if not by_have:
+        return
+
+    tasks = []
+    for have, keys in by_have.items():
+        chunksize = len(keys)
+        if pool is not None:
+            chunksize = max(1, len(keys) // (4 * (os.cpu_count() or 1)))
+        for start in range(0, len(keys), chunksize):
+            tasks.append((keys[start:start + chunksize], have, num_episodes - have))
+
+    if pool is not None:
+        results = pool.starmap(evaluate_genomes, tasks)
+    else:
+        results = [evaluate_genomes(*task) for task in tasks]
+
+    for (batch, _, _), stats in zip(tasks, results):
+        for key, row in zip(batch, stats):
+            cache[key].extend(row)
+
+
+class Evaluation(NamedTuple):
+    """evaluate_population's result; arrays are per genome, in population order"""
+    fitnesses: np.ndarray  # mean reward over the floors each genome was raced on
+    fully_raced: np.ndarray  # bool: raced on all episodes_per_eval floors
+    selection: np.ndarray  # tournament score: rank by (floors raced, fitness), higher is better
+    average: float  # mean reward over the first round's floors, which every genome played
+
+
+def evaluate_population(
+    population: Population,
+    pool: Optional[PoolType] = None,
+    episodes_per_eval: int = EPISODES_PER_EVAL,
+    num_elites: int = 1,
+) -> Evaluation:
+    """
+    Fitness of every genome (row), raced by successive halving: every
+    distinct genome plays RACING_FIRST_EPISODES floors, the better half on
+    those floors (but never fewer than num_elites genomes) plays up to twice
+    as many, and so on until the survivors reach episodes_per_eval.
+
+    Genomes dropped early keep their noisier short-race fitness. Means over
+    different floor sets don't compare, so elites and the generation's best
+    should come from the fully_raced genomes (at least num_elites rows, or
+    every row if the population has fewer distinct genomes), and the reported
+    average is taken over the first round's floors. Tournaments use
+    selection, which ranks genomes raced further above all genomes dropped
+    earlier (each of them beat those on the floors they shared) and by
+    fitness among genomes raced equally far, so a short lucky race never
+    outranks a full one. This plays far fewer episodes than evaluating
+    everyone fully.
+
+    play_controllers reseeds the global RNG for each episode, so stats are
+    the same whichever process plays them, and they are cached per genome:
+    elites and duplicate children only play floors they have not played yet.
+    Fitness only ever uses the floors raced in this call, so it depends on the
+    population alone and not on what the cache happens to hold.
+    With a pool the batches are spread over its workers; serially the
+    caller's RNG state is restored afterwards.
+    """
+    cache = _FITNESS_CACHE
+    keys = [row.tobytes() for row in population]
+
+    state = random.getstate()
+    field = list(dict.fromkeys(keys))  # distinct genomes, first-seen order
+    num_episodes = min(RACING_FIRST_EPISODES, episodes_per_eval)
+    raced: Dict[bytes, int] = {}  # key -> floors it was raced on this call
+    while True:
+        _extend_stats(field, num_episodes, pool)
+        raced.update(dict.fromkeys(field, num_episodes))
+        if num_episodes >= episodes_per_eval:
+            break
+        # compare on the floors every racer has played
+        scores = np.array([_total_reward(cache[k][:num_episodes]) for k in field])
+        keep = elite_indices(scores, min(len(field), max(num_elites, len(field) // 2)))
+        field = [field[i] for i in keep.tolist()]
+        num_episodes = min(2 * num_episodes, episodes_per_eval)
+    if pool is None:
+        random.setstate(state)
+
+    first_round = min(RACING_FIRST_EPISODES, episodes_per_eval)
+    fitnesses = np.empty(len(keys), dtype=np.float64)
+    first_round_total = 0.0
+    for i, key in enumerate(keys):
+        cache.move_to_end(key)
+        stats = cache[key]
+        fitnesses[i] = _total_reward(stats[:raced[key]]) / raced[key]
+        first_round_total += _total_reward(stats[:first_round])
+    while len(cache) > FITNESS_CACHE_SIZE:
+        cache.popitem(last=False)
+    floors = np.array([raced[key] for key in keys])
+
+    # dense rank of (floors, fitness): equal pairs (duplicate genomes) share a rank
+    order = np.lexsort((fitnesses, floors))
+    changed = np.ones(len(keys), dtype=np.int64)
+    changed[1:] = (np.diff(floors[order]) != 0) | (np.diff(fitnesses[order]) != 0)
+    selection = np.empty(len(keys), dtype=np.int64)
+    selection[order] = np.cumsum(changed)
+
+    return Evaluation(
+        fitnesses, floors == episodes_per_eval, selection, first_round_total / (first_round * len(keys))
+    )
+
+
+def random_population(pop_size: int, rng: np.random.Generator) -> Population:
+    """pop_size uniformly random genomes"""
+    return rng.integers(
+        0, DecisionTreeController.num_actions(), size=(pop_size, DecisionTreeController.num_genes()), dtype=np.int8
+    )
+
+
+def elite_indices(fitnesses: np.ndarray, num_elites: int) -> np.ndarray:
+    """
+    Rows of the num_elites fittest genomes, best first. A partition finds the
+    cutoff fitness in O(N) and only the elites themselves get sorted. Ties
+    (at the cutoff and among elites) go to the earlier row, same as a stable
+    sorted(..., reverse=True) over the whole population.
+    """
+    cutoff = -np.partition(-fitnesses, num_elites - 1)[num_elites - 1]
+    above = np.flatnonzero(fitnesses > cutoff)
+    at_cutoff = np.flatnonzero(fitnesses == cutoff)[: num_elites - len(above)]
+    top = np.concatenate([above, at_cutoff])
+    return top[np.argsort(-fitnesses[top], kind="stable")]
+
+
+def breed(
+    population: Population,
+    fitnesses: np.ndarray,
+    num_children: int,
+    rng: np.random.Generator,
+    tournament_size: int = TOURNAMENT_SIZE,
+    mutation_rate: float = MUTATION_RATE,
+) -> Population:
+    """
+    num_children new genomes, all at once:
+        - tournament selection: each parent is the fittest of tournament_size
+          random picks (first one wins ties); fitnesses only need to order
+          genomes, so run_ga passes Evaluation.selection
+        - uniform crossover: each gene 50/50 from either parent
+        - per-gene mutation to a random action with probability mutation_rate
+    """
+    pop_size, num_genes = population.shape
+
+    # (2, num_children, tournament_size) contestants -> winning row per parent slot
+    contestants = rng.integers(0, pop_size, size=(2, num_children, tournament_size))
+    best = fitnesses[contestants].argmax(axis=-1)
+    parents = np.take_along_axis(contestants, best[..., None], axis=-1)[..., 0]
+
+    # one random bit per gene: 8 coin flips per drawn byte
+    coin_bytes = rng.integers(0, 256, size=(num_children, (num_genes + 7) // 8), dtype=np.uint8)
+    take_first = np.unpackbits(coin_bytes, axis=1, count=num_genes).view(bool)
+    children = np.where(take_first, population[parents[0]], population[parents[1]])
+
+    # draw how many genes mutate, then which ones, instead of a float per gene
+    flat = children.reshape(-1)
+    num_mutations = rng.binomial(flat.size, mutation_rate)
+    mutated = rng.choice(flat.size, size=num_mutations, replace=False)
+    flat[mutated] = rng.integers(0, DecisionTreeController.num_actions(), size=num_mutations, dtype=flat.dtype)
+    return children
+
+
+def print_generation(gen: int, best_fitness: float, avg_fitness: float) -> None:
+    """Default run_ga progress line (avg is over the first racing round's floors)"""
+    print(
+        f"Generation {gen:02d} | "
+        f"best: {best_fitness:.2f} | "
+        f"avg (first {RACING_FIRST_EPISODES} floors): {avg_fitness:.2f}"
+    )
+
+
+def run_ga(
+    seed: int = 0,
+    cfg: GAConfig = GAConfig(),
+    on_generation: Callable[[int, float, float], None] = print_generation,
+    pool: Optional[PoolType] = None,
+) -> Tuple[Genome, float]:
     """Run the full GA loop and return the best genome discovered.
 
         Steps:
             1. Initialize a random population.
             2. For each generation:
-                - Evaluate fitness of all genomes.
-                - Track the best genome overall.
+                - Evaluate fitness of all genomes (see evaluate_population).
+                - Track the best genome overall, among the fully raced ones.
+                - Report (generation, best, average) fitness to on_generation;
+                  the average is over the first racing round's floors.
                 - Build a new population via:
                     * Elitism
                     * Tournament selection
@@ -90,60 +360,70 @@ def run_ga(seed: int = 0) -> Tuple[Genome, float]:
 
         Args:
             seed (int): Random seed for reproducibility.
+            cfg (GAConfig): Hyperparameters (defaults to the module constants).
+            on_generation: Called after each generation is evaluated, with
+                (generation, best fitness, average fitness). The average is
+                over the first min(RACING_FIRST_EPISODES, episodes_per_eval)
+                floors, the only ones every genome plays, not over each
+                genome's full evaluation.
+            pool: Worker pool to evaluate in, so back-to-back runs can share
+                one. By default run_ga starts its own for the whole run, or
+                evaluates serially on a single CPU, where workers would only
+                add dispatch overhead.
 
         Returns:
             (Genome, float): Tuple of (best_genome, best_fitness).
         """
-    random.seed(seed)
+    rng = np.random.default_rng(seed)
 
     #init pop
-    population: List[Genome] = [make_random_genome() for _ in range(POP_SIZE)]
+    population = random_population(cfg.pop_size, rng)
 
-    best_overall_genome: Genome = population[0][:]
+    best_overall_genome: Genome = population[0].tolist()
     best_overall_fitness: float = float("-inf")
 
-    num_elites = max(1, int(ELITE_FRACTION * POP_SIZE))
+    num_elites = max(1, int(cfg.elite_fraction * cfg.pop_size))
+
+    pool_context: ContextManager[Optional[PoolType]] = nullcontext(pool)
+    if pool is None and (os.cpu_count() or 1) > 1:
+        pool_context = Pool()
 
-    for gen in range(NUM_GENERATIONS):
-        # eval pop
-        fitnesses = [evaluate_genome(g) for g in population]
+    with pool_context as pool:
+        for gen in range(cfg.num_generations):
+            # eval pop
+            evaluation = evaluate_population(population, pool, cfg.episodes_per_eval, num_elites)
+            fitnesses = evaluation.fitnesses
 
-        # track best guy
-        gen_best_idx = max(range(POP_SIZE), key=lambda i: fitnesses[i])
-        gen_best_fitness = fitnesses[gen_best_idx]
-        gen_best_genome = population[gen_best_idx]
+            # elites and best only among genomes raced on every floor, so they compare like with like
+            full_rows = np.flatnonzero(evaluation.fully_raced)
+            elite_rows = full_rows[elite_indices(fitnesses[full_rows], num_elites)]
 
-        if gen_best_fitness > best_overall_fitness:
-            best_overall_fitness = gen_best_fitness
-            best_overall_genome = gen_best_genome[:]
+            # track best guy
+            gen_best_idx = int(elite_rows[0])
+            gen_best_fitness = float(fitnesses[gen_best_idx])
 
-        avg_fitness = sum(fitnesses) / len(fitnesses)
-        print(
-            f"Generation {gen:02d} | "
-            f"best: {gen_best_fitness:.2f} | "
-            f"avg: {avg_fitness:.2f}"
-        )
+            if gen_best_fitness > best_overall_fitness:
+                best_overall_fitness = gen_best_fitness
+                best_overall_genome = population[gen_best_idx].tolist()
 
-        # sort by fitness and keep elites
-        sorted_indices = sorted(range(POP_SIZE), key=lambda i: fitnesses[i], reverse=True)
-        new_population: List[Genome] = [population[i][:] for i in sorted_indices[:num_elites]]
+            on_generation(gen, gen_best_fitness, evaluation.average)
 
-        # rest of population selection + crossover + mutation
-        while len(new_population) < POP_SIZE:
-            parent1 = tournament_select(population, fitnesses)
-            parent2 = tournament_select(population, fitnesses)
-            child = crossover(parent1, parent2)
-            child = mutate(child)
-            new_population.append(child)
+            # keep elites
+            elites = population[elite_rows]
 
-        population = new_population
+            # rest of population selection + crossover + mutation
+            children = breed(
+                population, evaluation.selection, cfg.pop_size - num_elites, rng, cfg.tournament_size, cfg.mutation_rate
+            )
+
+            population = np.concatenate([elites, children])
 
-    print("\nBest overall genome:", best_overall_genome)
-    print("Best overall fitness:", best_overall_fitness)
     return best_overall_genome, best_overall_fitness
 
 
 if __name__ == "__main__":
+    load_fitness_cache()
     best_genome, best_fit = run_ga(seed=0)
-
-
+    save_fitness_cache()
+    print("\nBest overall genome:", best_genome)
+    print("Best overall fitness:", best_fit)
@@ -17,12 +17,42 @@ This provides a non-GA baseline that still uses optimization, making it
 useful for algorithm comparison against the GA-evolved controller.
 """
 import random
-from typing import List, Tuple, Dict, Set, Optional
+from typing import Deque, List, Tuple, Dict, Set, Optional
 from collections import deque
+from itertools import islice
 
-from agent import Action, Agent, Pos
-from dungeon import Dungeon, TileType
+import numpy as np
+
+from agent import ACTION_DELTA, Action, Agent, Pos
+from dungeon import (
+    Dungeon,
+    MONSTER_MASK,
+    MONSTER_MELEE_CODE,
+    MONSTER_MAGIC_CODE,
+)
 from controllers import BaseController
+from fast_ops import position_score
+
+
+# movement actions paired with their (dx, dy), in the order the candidate loops try them
+_MOVE_DELTAS: Tuple[Tuple[Action, Tuple[int, int]], ...] = (
+    (Action.UP, (0, -1)),
+    (Action.DOWN, (0, 1)),
+    (Action.LEFT, (-1, 0)),
+    (Action.RIGHT, (1, 0)),
+)
+
+# number of recent positions _detect_stuck_in_local_optima looks at
+STUCK_WINDOW = 6
+
+# actions that get a bonus when health is critical (drink, or move away)
+_SURVIVAL_ACTIONS = frozenset((Action.DRINK_HEALTH, Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT))
+
+# non-move actions bound once: the per-turn code below compares against these many
+# times per decision, and each Action.X is an enum class attribute lookup
+_STAY, _MELEE, _MAGIC_BLAST, _DRINK_HEALTH, _DRINK_MANA = (
+    Action.STAY, Action.MELEE, Action.MAGIC_BLAST, Action.DRINK_HEALTH, Action.DRINK_MANA
+)
 
 
 class HillClimbingHandmadeController(BaseController):
@@ -33,6 +63,12 @@ class HillClimbingHandmadeController(BaseController):
     3. Select the action with highest immediate reward
     4. Use memory to avoid getting stuck in local optima
     """
+
+    __slots__ = (
+        "exploration_rate", "memory", "visited_positions", "last_action", "stuck_counter",
+        "_dist_to_exit", "_last_three", "_monsters", "_kills_seen", "_window_counts",
+        "_turn_moves",
+    )
     
     def __init__(self, exploration_rate: float = 0.1):
         """
@@ -43,168 +79,154 @@ class HillClimbingHandmadeController(BaseController):
         """
         super().__init__()
         self.exploration_rate = exploration_rate
-        self.memory: List[Pos] = []  # Remember recent positions
+        self.memory: Deque[Pos] = deque(maxlen=10)  # Remember recent positions
+        self._last_three: List[Pos] = []  # tail of memory the heuristic checks for backtracking
+        # how often each position appears in the last STUCK_WINDOW entries of memory
+        self._window_counts: Dict[Pos, int] = {}
         self.visited_positions: Set[Pos] = set()
         self.last_action: Optional[Action] = None
         self.stuck_counter: int = 0
+        # walking distance to the exit per tile, [y, x]; built once per floor
+        self._dist_to_exit: Optional[np.ndarray] = None
+        # monster xs and ys, rescanned only after the agent kills one (see _monster_positions)
+        self._monsters: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._kills_seen: int = 0
+        # this turn's walkable moves, built on first use (see _walkable_moves)
+        self._turn_moves: Optional[List[Tuple[Action, int, int]]] = None
         
     def reset_episode(self) -> None:
         """Reset internal state for new episode"""
         self.memory.clear()
+        self._last_three = []
+        self._window_counts.clear()
         self.visited_positions.clear()
         self.last_action = None
         self.stuck_counter = 0
-        
+        self._dist_to_exit = None
+        self._monsters = None
+        self._turn_moves = None
+
+    def start_episode(self, dungeon: Dungeon) -> None:
+        super().start_episode(dungeon)
+        self._dist_to_exit = self._exit_distances(dungeon)
+
+    def _exit_distances(self, dungeon: Dungeon) -> np.ndarray:
+        """
+        Shortest walking distance from every tile to the exit (BFS from the exit
+        over walkable tiles). Walls never change during a floor, so this is
+        computed once. Tiles that can't reach the exit get width * height,
+        longer than any real path.
+        """
+        width, height = dungeon.width, dungeon.height
+        walkable = dungeon.walkable
+        dist = [[width * height] * width for _ in range(height)]
+        ex, ey = dungeon.exit_pos
+        dist[ey][ex] = 0
+        queue = deque([(ex, ey)])
+        while queue:
+            x, y = queue.popleft()
+            step = dist[y][x] + 1
+            for _, (dx, dy) in _MOVE_DELTAS:
+                nx, ny = x + dx, y + dy
+                # walkable is padded, so off-grid neighbours read as blocked
+                if walkable[ny + 1, nx + 1] and step < dist[ny][nx]:
+                    dist[ny][nx] = step
+                    queue.append((nx, ny))
+        return np.array(dist, dtype=np.int64)
+
+    def _walkable_moves(self, agent: Agent, dungeon: Dungeon) -> List[Tuple[Action, int, int]]:
+        """
+        (move, new_x, new_y) for each move from the agent's tile onto a walkable
+        one, in _MOVE_DELTAS order. Read once per turn from a single slice of the
+        walkable mask and shared by the candidate, emergency and exploration code.
+        """
+        moves = self._turn_moves
+        if moves is None:
+            x, y = agent.x, agent.y
+            moves = self._turn_moves = [
+                (move, x + dx, y + dy)
+                for (move, (dx, dy)), ok in zip(_MOVE_DELTAS, dungeon.walkable_mask_at(x, y))
+                if ok
+            ]
+        return moves
+
     def _generate_candidate_actions(self, agent: Agent, dungeon: Dungeon) -> List[Action]:
         """Generate all possible candidate actions (neighbors in action space)"""
         candidates = []
         
         # Always consider movement actions
-        for move in [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]:
-            dx, dy = 0, 0
-            if move == Action.UP:
-                dy = -1
-            elif move == Action.DOWN:
-                dy = 1
-            elif move == Action.LEFT:
-                dx = -1
-            elif move == Action.RIGHT:
-                dx = 1
-                
-            new_x, new_y = agent.x + dx, agent.y + dy
-            if dungeon.is_walkable(new_x, new_y):
-                candidates.append(move)
+        for move, _, _ in self._walkable_moves(agent, dungeon):
+            candidates.append(move)
                 
         # Consider staying in place
-        candidates.append(Action.STAY)
+        candidates.append(_STAY)
         
         # Consider combat actions if appropriate
-        melee_monster_nearby = False
-        magic_monster_nearby = False
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            x, y = agent.x + dx, agent.y + dy
-            if dungeon.in_bounds(x, y):
-                tile = dungeon.get_tile(x, y)
-                if tile == TileType.MONSTER_MELEE:
-                    melee_monster_nearby = True
-                elif tile == TileType.MONSTER_MAGIC:
-                    magic_monster_nearby = True
-        
-        if melee_monster_nearby:
-            candidates.append(Action.MELEE)
+        codes = dungeon.cross_codes(agent.x, agent.y)
+        if MONSTER_MELEE_CODE in codes:
+            candidates.append(_MELEE)
             
-        if magic_monster_nearby:
-            candidates.append(Action.MAGIC_BLAST)
+        if MONSTER_MAGIC_CODE in codes:
+            candidates.append(_MAGIC_BLAST)
             
         # Consider potion actions
         if agent.health_potions > 0:
-            candidates.append(Action.DRINK_HEALTH)
+            candidates.append(_DRINK_HEALTH)
             
         if agent.mana_potions > 0:
-            candidates.append(Action.DRINK_MANA)
+            candidates.append(_DRINK_MANA)
             
         return candidates
     
-    def _evaluate_position_heuristic(self, x: int, y: int, agent: Agent, dungeon: Dungeon) -> float:
+    def _monster_positions(self, agent: Agent, dungeon: Dungeon) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        xs and ys of all monster tiles, in row-major order.
+
+        Monsters never move or spawn during a floor, and only the agent's attacks
+        remove them, so the grid is rescanned only when agent.monsters_killed
+        has changed since the last scan.
+        """
+        if self._monsters is None or agent.monsters_killed != self._kills_seen:
+            grid = dungeon.grid
+            ys, xs = np.nonzero((grid == MONSTER_MELEE_CODE) | (grid == MONSTER_MAGIC_CODE))
+            self._monsters = (xs, ys)
+            self._kills_seen = agent.monsters_killed
+        return self._monsters
+
+    def _evaluate_position_heuristic(
+        self, x: int, y: int, agent: Agent, dungeon: Dungeon, monsters: Tuple[np.ndarray, np.ndarray]
+    ) -> float:
         """
         Evaluate a position using multiple factors (higher is better).
-        This is the heuristic function for hill climbing.
+        This is the heuristic function for hill climbing; the arithmetic is
+        compiled in fast_ops.position_score.
         
         Args:
             x, y: Position to evaluate
             agent: Current agent state
             dungeon: Current dungeon state
+            monsters: Monster xs and ys this turn (see _monster_positions)
             
         Returns:
             Heuristic score (higher is better)
         """
         if not dungeon.in_bounds(x, y):
             return -float('inf')
-        
-        if not dungeon.is_walkable(x, y):
-            return -float('inf')
-            
-        score = 0.0
-        
-        # 1. Distance to exit (negative because closer is better)
-        exit_x, exit_y = dungeon.exit_pos
-        dist_to_exit = abs(exit_x - x) + abs(exit_y - y)
-        score -= dist_to_exit * 2.0
-        
-        # 2. Check for items on the tile
-        tile = dungeon.get_tile(x, y)
-        if tile == TileType.HEALTH_POTION:
-            score += 50  # High value for health potions
-        elif tile == TileType.MANA_POTION:
-            score += 40  # High value for mana potions
-        elif tile == TileType.COIN:
-            score += 30  # Value for coins
-            
-        # 3. Check adjacent items (can collect next turn)
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nx, ny = x + dx, y + dy
-            if dungeon.in_bounds(nx, ny):
-                adj_tile = dungeon.get_tile(nx, ny)
-                if adj_tile == TileType.HEALTH_POTION:
-                    score += 25
-                elif adj_tile == TileType.MANA_POTION:
-                    score += 20
-                elif adj_tile == TileType.COIN:
-                    score += 15
-                    
-        # 4. Avoid monsters (negative score for being adjacent to monsters)
-        monster_penalty = 0
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            nx, ny = x + dx, y + dy
-            if dungeon.in_bounds(nx, ny):
-                adj_tile = dungeon.get_tile(nx, ny)
-                if adj_tile == TileType.MONSTER_MELEE:
-                    monster_penalty += 30  # High penalty for melee monsters
-                elif adj_tile == TileType.MONSTER_MAGIC:
-                    monster_penalty += 25  # Penalty for magic monsters
-        score -= monster_penalty
-        
-        # 5. Exploration bonus for unvisited positions
-        if (x, y) not in self.visited_positions:
-            score += 10
-            
-        # 6. Penalize backtracking (positions visited recently)
-        if (x, y) in self.memory[-3:]:
-            score -= 5
-            
-        # 7. Prefer positions that are farther from monsters
-        monster_dist_sum = 0
-        monster_count = 0
-        for my in range(dungeon.height):
-            for mx in range(dungeon.width):
-                tile_type = dungeon.get_tile(mx, my)
-                if tile_type in [TileType.MONSTER_MELEE, TileType.MONSTER_MAGIC]:
-                    monster_dist = abs(mx - x) + abs(my - y)
-                    monster_dist_sum += monster_dist
-                    monster_count += 1
-                    
-        if monster_count > 0:
-            avg_monster_dist = monster_dist_sum / monster_count
-            score += avg_monster_dist * 0.5  # Prefer being farther from monsters
-            
-        # 8. If low health, strongly prefer moving away from monsters
-        if agent.health < 40:
-            # Find closest monster
-            closest_monster_dist = float('inf')
-            for my in range(dungeon.height):
-                for mx in range(dungeon.width):
-                    tile_type = dungeon.get_tile(mx, my)
-                    if tile_type in [TileType.MONSTER_MELEE, TileType.MONSTER_MAGIC]:
-                        dist = abs(mx - x) + abs(my - y)
-                        if dist < closest_monster_dist:
-                            closest_monster_dist = dist
-                            
-            if closest_monster_dist < 3:  # Monster is nearby
-                score += closest_monster_dist * 5  # Strongly prefer moving away
-                
-        return score
+
+        exit_dists = self._dist_to_exit
+        if exit_dists is None:
+            # start_episode wasn't called for this floor
+            exit_dists = self._dist_to_exit = self._exit_distances(dungeon)
+        pos = (x, y)
+        monster_xs, monster_ys = monsters
+        return float(position_score(
+            dungeon.padded, exit_dists, monster_xs, monster_ys, x, y,
+            pos not in self.visited_positions, pos in self._last_three, agent.health < 40,
+        ))
     
-    def _evaluate_action_heuristic(self, action: Action, agent: Agent, dungeon: Dungeon) -> float:
+    def _evaluate_action_heuristic(
+        self, action: Action, agent: Agent, dungeon: Dungeon, monsters: Tuple[np.ndarray, np.ndarray]
+    ) -> float:
         """
         Evaluate an action using heuristic function (higher score is better).
         
@@ -212,6 +234,7 @@ class HillClimbingHandmadeController(BaseController):
             action: Action to evaluate
             agent: Current agent state
             dungeon: Current dungeon state
+            monsters: Monster xs and ys this turn (see _monster_positions)
             
         Returns:
             Heuristic score for the action
@@ -219,36 +242,21 @@ class HillClimbingHandmadeController(BaseController):
         score = 0.0
         
         # Movement actions
-        if action in [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT, Action.STAY]:
-            dx, dy = 0, 0
-            if action == Action.UP:
-                dy = -1
-            elif action == Action.DOWN:
-                dy = 1
-            elif action == Action.LEFT:
-                dx = -1
-            elif action == Action.RIGHT:
-                dx = 1
-                
+        delta = ACTION_DELTA[action]
+        if delta is not None:
+            dx, dy = delta
             new_x = agent.x + dx
             new_y = agent.y + dy
             
             if dungeon.is_walkable(new_x, new_y):
-                score = self._evaluate_position_heuristic(new_x, new_y, agent, dungeon)
+                score = self._evaluate_position_heuristic(new_x, new_y, agent, dungeon, monsters)
             else:
                 return -float('inf')  # Invalid move
                 
         # Combat actions
-        elif action == Action.MELEE:
+        elif action == _MELEE:
             # Check if there's a melee monster to attack
-            has_melee_monster = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-                x, y = agent.x + dx, agent.y + dy
-                if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == TileType.MONSTER_MELEE:
-                    has_melee_monster = True
-                    break
-                    
-            if has_melee_monster:
+            if MONSTER_MELEE_CODE in dungeon.cross_codes(agent.x, agent.y):
                 score = 60  # Good to kill a monster
                 # Bonus if low health and monster is adjacent
                 if agent.health < 50:
@@ -256,19 +264,12 @@ class HillClimbingHandmadeController(BaseController):
             else:
                 score = -20  # Wasted action
                 
-        elif action == Action.MAGIC_BLAST:
+        elif action == _MAGIC_BLAST:
             if agent.mana <= 0:
                 return -30  # No mana for magic
                 
             # Check if there's a magic monster to attack
-            has_magic_monster = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-                x, y = agent.x + dx, agent.y + dy
-                if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == TileType.MONSTER_MAGIC:
-                    has_magic_monster = True
-                    break
-                    
-            if has_magic_monster:
+            if MONSTER_MAGIC_CODE in dungeon.cross_codes(agent.x, agent.y):
                 score = 55  # Good to kill magic monster (slightly less than melee due to mana cost)
                 # Bonus if low on mana but have potions
                 if agent.mana == 1 and agent.mana_potions > 0:
@@ -277,7 +278,7 @@ class HillClimbingHandmadeController(BaseController):
                 score = -25  # Wasted mana
                 
         # Potion actions
-        elif action == Action.DRINK_HEALTH:
+        elif action == _DRINK_HEALTH:
             if agent.health_potions > 0:
                 health_needed = 100 - agent.health
                 if health_needed > 0:
@@ -291,19 +292,12 @@ class HillClimbingHandmadeController(BaseController):
             else:
                 score = -15  # No health potions
                 
-        elif action == Action.DRINK_MANA:
+        elif action == _DRINK_MANA:
             if agent.mana_potions > 0:
                 mana_needed = 3 - agent.mana
                 if mana_needed > 0:
                     # Check if there are magic monsters nearby
-                    magic_monsters_nearby = False
-                    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-                        x, y = agent.x + dx, agent.y + dy
-                        if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == TileType.MONSTER_MAGIC:
-                            magic_monsters_nearby = True
-                            break
-                            
-                    if magic_monsters_nearby:
+                    if MONSTER_MAGIC_CODE in dungeon.cross_codes(agent.x, agent.y):
                         score = mana_needed * 20  # Very valuable to have mana against magic monsters
                     else:
                         score = mana_needed * 10  # Some value for future use
@@ -315,9 +309,9 @@ class HillClimbingHandmadeController(BaseController):
         # Adjust score based on agent state
         if agent.health < 30:
             # Prioritize survival when health is critical
-            if action in [Action.DRINK_HEALTH, Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]:
+            if action in _SURVIVAL_ACTIONS:
                 score += 25
-            elif action == Action.MELEE:
+            elif action == _MELEE:
                 score -= 15  # Avoid combat when very low health
                 
         # Penalize repeated actions (to encourage variety)
@@ -337,66 +331,59 @@ class HillClimbingHandmadeController(BaseController):
         Returns:
             Emergency action if needed, None otherwise
         """
+        # (left, right, up, down, here); off-grid neighbours read as WALL
+        codes = dungeon.cross_codes(agent.x, agent.y)
+
         # Emergency: Very low health and adjacent to monster
         if agent.health < 20:
             # Check if monster is adjacent
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-                x, y = agent.x + dx, agent.y + dy
-                if dungeon.in_bounds(x, y):
-                    tile = dungeon.get_tile(x, y)
-                    if tile in [TileType.MONSTER_MELEE, TileType.MONSTER_MAGIC]:
-                        # Try to move away
-                        safe_moves = []
-                        for move in [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]:
-                            mdx, mdy = 0, 0
-                            if move == Action.UP:
-                                mdy = -1
-                            elif move == Action.DOWN:
-                                mdy = 1
-                            elif move == Action.LEFT:
-                                mdx = -1
-                            elif move == Action.RIGHT:
-                                mdx = 1
-                                
-                            nx, ny = agent.x + mdx, agent.y + mdy
-                            if dungeon.is_walkable(nx, ny):
-                                # Check if this move takes us away from monsters
-                                monster_near = False
-                                for ddx, ddy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                                    mx, my = nx + ddx, ny + ddy
-                                    if dungeon.in_bounds(mx, my):
-                                        if dungeon.get_tile(mx, my) in [TileType.MONSTER_MELEE, TileType.MONSTER_MAGIC]:
-                                            monster_near = True
-                                            break
-                                            
-                                if not monster_near:
-                                    safe_moves.append(move)
-                                    
-                        if safe_moves:
-                            return random.choice(safe_moves)
-                            
-                        # If no safe moves, try to attack or drink potion
-                        if agent.health_potions > 0:
-                            return Action.DRINK_HEALTH
-                        elif tile == TileType.MONSTER_MELEE:
-                            return Action.MELEE
-                        elif tile == TileType.MONSTER_MAGIC and agent.mana > 0:
-                            return Action.MAGIC_BLAST
-                            
+            for tile in codes:
+                if (MONSTER_MASK >> tile) & 1:
+                    # Try to move away
+                    safe_moves = []
+                    for move, nx, ny in self._walkable_moves(agent, dungeon):
+                        # Check if this move takes us away from monsters
+                        left, right, up, down, _ = dungeon.cross_codes(nx, ny)
+                        monster_near = (MONSTER_MASK >> left | MONSTER_MASK >> right
+                                        | MONSTER_MASK >> up | MONSTER_MASK >> down) & 1
+
+                        if not monster_near:
+                            safe_moves.append(move)
+
+                    if safe_moves:
+                        return random.choice(safe_moves)
+
+                    # If no safe moves, try to attack or drink potion
+                    if agent.health_potions > 0:
+                        return _DRINK_HEALTH
+                    elif tile == MONSTER_MELEE_CODE:
+                        return _MELEE
+                    elif tile == MONSTER_MAGIC_CODE and agent.mana > 0:
+                        return _MAGIC_BLAST
+
         # Emergency: No mana but magic monster adjacent and we have mana potion
         if agent.mana == 0:
-            magic_monster_adjacent = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-                x, y = agent.x + dx, agent.y + dy
-                if dungeon.in_bounds(x, y) and dungeon.get_tile(x, y) == TileType.MONSTER_MAGIC:
-                    magic_monster_adjacent = True
-                    break
-                    
-            if magic_monster_adjacent and agent.mana_potions > 0:
-                return Action.DRINK_MANA
+            if MONSTER_MAGIC_CODE in codes and agent.mana_potions > 0:
+                return _DRINK_MANA
                 
         return None
     
+    def _recent_positions(self, count: int) -> List[Pos]:
+        """The last count positions in memory, oldest first"""
+        return list(islice(self.memory, max(0, len(self.memory) - count), None))
+
+    def _remember(self, pos: Pos) -> None:
+        """Append pos to memory, keeping _window_counts in step with its last STUCK_WINDOW entries"""
+        memory, counts = self.memory, self._window_counts
+        memory.append(pos)  # maxlen drops the oldest
+        counts[pos] = counts.get(pos, 0) + 1
+        if len(memory) > STUCK_WINDOW:
+            old = memory[-STUCK_WINDOW - 1]
+            if counts[old] == 1:
+                del counts[old]
+            else:
+                counts[old] -= 1
+
     def _detect_stuck_in_local_optima(self) -> bool:
         """
         Detect if agent is stuck in a local optima (repeating patterns).
@@ -404,23 +391,12 @@ class HillClimbingHandmadeController(BaseController):
         Returns:
             True if stuck, False otherwise
         """
-        if len(self.memory) < 6:
+        if len(self.memory) < STUCK_WINDOW:
             return False
-            
-        # Check for repeating position patterns
-        recent_positions = self.memory[-6:]
-        
-        # Check for 3-position cycle
-        if (recent_positions[0] == recent_positions[2] == recent_positions[4] and
-            recent_positions[1] == recent_positions[3] == recent_positions[5]):
-            return True
-            
-        # Check for staying in same area
-        unique_positions = set(recent_positions)
-        if len(unique_positions) <= 2:
-            return True
-            
-        return False
+
+        # Staying in the same area: at most two distinct positions in the window.
+        # This also covers an A-B-A-B-A-B back-and-forth cycle
+        return len(self._window_counts) <= 2
     
     def _get_exploratory_move(self, agent: Agent, dungeon: Dungeon) -> Action:
         """
@@ -433,47 +409,24 @@ class HillClimbingHandmadeController(BaseController):
         Returns:
             Exploratory action
         """
+        walkable_moves = self._walkable_moves(agent, dungeon)
+
         # Try to move to an unvisited position
         unvisited_moves = []
-        for move in [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]:
-            dx, dy = 0, 0
-            if move == Action.UP:
-                dy = -1
-            elif move == Action.DOWN:
-                dy = 1
-            elif move == Action.LEFT:
-                dx = -1
-            elif move == Action.RIGHT:
-                dx = 1
-                
-            new_x, new_y = agent.x + dx, agent.y + dy
-            if dungeon.is_walkable(new_x, new_y) and (new_x, new_y) not in self.visited_positions:
+        for move, new_x, new_y in walkable_moves:
+            if (new_x, new_y) not in self.visited_positions:
                 unvisited_moves.append(move)
                 
         if unvisited_moves:
             return random.choice(unvisited_moves)
             
         # If no unvisited moves, try any safe move
-        safe_moves = []
-        for move in [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]:
-            dx, dy = 0, 0
-            if move == Action.UP:
-                dy = -1
-            elif move == Action.DOWN:
-                dy = 1
-            elif move == Action.LEFT:
-                dx = -1
-            elif move == Action.RIGHT:
-                dx = 1
-                
-            new_x, new_y = agent.x + dx, agent.y + dy
-            if dungeon.is_walkable(new_x, new_y):
-                safe_moves.append(move)
+        safe_moves = [move for move, _, _ in walkable_moves]
                 
         if safe_moves:
             return random.choice(safe_moves)
             
-        return Action.STAY
+        return _STAY
     
     def select_action(self, agent: Agent, dungeon: Dungeon) -> Action:
         """
@@ -486,10 +439,11 @@ class HillClimbingHandmadeController(BaseController):
         Returns:
             Selected action
         """
+        self._turn_moves = None  # agent may have moved since the last turn
+
         # Update memory and visited positions
-        self.memory.append(agent.pos)
-        if len(self.memory) > 10:
-            self.memory.pop(0)
+        self._remember(agent.pos)
+        self._last_three = self._recent_positions(3)
             
         self.visited_positions.add(agent.pos)
         
@@ -511,32 +465,28 @@ class HillClimbingHandmadeController(BaseController):
         else:
             self.stuck_counter = 0
             
-        # Occasionally explore randomly (epsilon-greedy)
-        if random.random() < self.exploration_rate:
-            candidates = self._generate_candidate_actions(agent, dungeon)
-            if candidates:
-                exploratory_action = random.choice(candidates)
-                self.last_action = exploratory_action
-                return exploratory_action
-        
         # Generate candidate actions
         candidates = self._generate_candidate_actions(agent, dungeon)
+
+        # Occasionally explore randomly (epsilon-greedy)
+        if random.random() < self.exploration_rate and candidates:
+            exploratory_action = random.choice(candidates)
+            self.last_action = exploratory_action
+            return exploratory_action
         
         if not candidates:
-            self.last_action = Action.STAY
-            return Action.STAY
+            self.last_action = _STAY
+            return _STAY
             
-        # Evaluate all candidates using heuristic
-        scored_candidates = []
-        for action in candidates:
-            score = self._evaluate_action_heuristic(action, agent, dungeon)
-            scored_candidates.append((action, score))
-            
-        # Sort by score (highest first)
-        scored_candidates.sort(key=lambda x: x[1], reverse=True)
-        
-        # Return the best action
-        best_action, best_score = scored_candidates[0]
+        # Evaluate all candidates using heuristic; monsters are located once for all of them
+        monsters = self._monster_positions(agent, dungeon)
+        # and keep the best one (the earliest on ties), no list to sort
+        best_action = candidates[0]
+        best_score = self._evaluate_action_heuristic(best_action, agent, dungeon, monsters)
+        for action in candidates[1:]:
+            score = self._evaluate_action_heuristic(action, agent, dungeon, monsters)
+            if score > best_score:
+                best_action, best_score = action, score
         
         # If all scores are very low, try exploratory move
         if best_score < -50:
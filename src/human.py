@@ -5,12 +5,53 @@ No pathfinding, no memory, no complex algorithms - just if-then rules based on w
 """
 
 import random
-from typing import List, Tuple, Optional
+from typing import Dict, NamedTuple, Tuple, Optional
 from agent import Action, Agent
-from dungeon import Dungeon, TileType
+from dungeon import Dungeon, MONSTER_MASK, ITEM_MASK, MONSTER_MELEE_CODE, MONSTER_MAGIC_CODE
 from controllers import BaseController
 
 
+# directions a human "sees", as indices into Perception.tiles; same order as
+# Dungeon.cross_codes, so the tiles come straight from one cross_codes call
+LEFT, RIGHT, UP, DOWN, HERE = range(5)
+_NEIGHBOURS = (LEFT, RIGHT, UP, DOWN)
+
+# direction -> (move, (dx, dy))
+_DIRECTION_MOVES: Dict[int, Tuple[Action, Tuple[int, int]]] = {
+    UP: (Action.UP, (0, -1)),
+    DOWN: (Action.DOWN, (0, 1)),
+    LEFT: (Action.LEFT, (-1, 0)),
+    RIGHT: (Action.RIGHT, (1, 0)),
+}
+
+# movement actions with their (dx, dy), in the order random safe moves are tried
+_MOVE_DELTAS: Tuple[Tuple[Action, Tuple[int, int]], ...] = (
+    _DIRECTION_MOVES[UP],
+    _DIRECTION_MOVES[DOWN],
+    _DIRECTION_MOVES[LEFT],
+    _DIRECTION_MOVES[RIGHT],
+)
+
+# walkability bitmask (bit i set when _MOVE_DELTAS[i] is walkable) -> the walkable moves
+_SAFE_MOVES: Tuple[Tuple[Action, ...], ...] = tuple(
+    tuple(move for i, (move, _) in enumerate(_MOVE_DELTAS) if mask >> i & 1)
+    for mask in range(1 << len(_MOVE_DELTAS))
+)
+
+
+class Perception(NamedTuple):
+    """Everything a human notices in one glance (see _what_can_i_see)"""
+    tiles: Tuple[int, int, int, int, int]  # codes at LEFT, RIGHT, UP, DOWN, HERE; WALL off the grid
+    health: int
+    mana: int
+    health_potions: int
+    mana_potions: int
+    exit_direction: int  # LEFT / RIGHT / UP / DOWN, or HERE when standing on the exit
+    immediate_danger: bool  # monster on my tile
+    items_nearby: bool
+    monsters_nearby: bool
+
+
 class HumanLikeHandmadeController(BaseController):
     """
     A controller that mimics human decision-making:
@@ -19,6 +60,8 @@ class HumanLikeHandmadeController(BaseController):
     - Focuses on survival, item collection, and reaching the exit
     - No memory, no pathfinding, no complex algorithms
     """
+
+    __slots__ = ()
     
     def __init__(self):
         super().__init__()
@@ -28,49 +71,28 @@ class HumanLikeHandmadeController(BaseController):
         """Reset for new episode - humans don't really 'reset' but we need to match interface"""
         pass
         
-    def _what_can_i_see(self, agent: Agent, dungeon: Dungeon) -> dict:
+    def _what_can_i_see(self, agent: Agent, dungeon: Dungeon) -> Perception:
         """
         Simulate what a human player can see immediately around them.
-        Returns a dictionary of immediate perceptions.
+        Returns the immediate perceptions.
         """
-        perceptions = {
-            'current_tile': dungeon.get_tile(agent.x, agent.y),
-            'adjacent_tiles': {},
-            'my_health': agent.health,
-            'my_mana': agent.mana,
-            'my_health_potions': agent.health_potions,
-            'my_mana_potions': agent.mana_potions,
-            'exit_direction': self._get_exit_direction(agent, dungeon),
-            'immediate_danger': False,
-            'items_nearby': False,
-            'monsters_nearby': False
-        }
-        
-        # Check all adjacent tiles (including current position)
-        for dx, dy, direction in [
-            (0, 0, "here"),
-            (-1, 0, "left"),
-            (1, 0, "right"),
-            (0, -1, "up"),
-            (0, 1, "down")
-        ]:
-            x, y = agent.x + dx, agent.y + dy
-            if dungeon.in_bounds(x, y):
-                tile = dungeon.get_tile(x, y)
-                perceptions['adjacent_tiles'][direction] = tile
-                
-                # Update danger and item flags
-                if tile in [TileType.MONSTER_MELEE, TileType.MONSTER_MAGIC]:
-                    perceptions['monsters_nearby'] = True
-                    if dx == 0 and dy == 0:  # Monster is on my tile!
-                        perceptions['immediate_danger'] = True
-                        
-                if tile in [TileType.HEALTH_POTION, TileType.MANA_POTION, TileType.COIN]:
-                    perceptions['items_nearby'] = True
-                    
-        return perceptions
+        exit_direction = self._get_exit_direction(agent, dungeon)
+        tiles = dungeon.cross_codes(agent.x, agent.y)
+        left, right, up, down, here = tiles
+        seen = (1 << left) | (1 << right) | (1 << up) | (1 << down) | (1 << here)
+        return Perception(
+            tiles=tiles,
+            health=agent.health,
+            mana=agent.mana,
+            health_potions=agent.health_potions,
+            mana_potions=agent.mana_potions,
+            exit_direction=exit_direction,
+            immediate_danger=bool((MONSTER_MASK >> here) & 1),  # Monster is on my tile!
+            items_nearby=bool(seen & ITEM_MASK),
+            monsters_nearby=bool(seen & MONSTER_MASK),
+        )
     
-    def _get_exit_direction(self, agent: Agent, dungeon: Dungeon) -> str:
+    def _get_exit_direction(self, agent: Agent, dungeon: Dungeon) -> int:
         """
         Simple direction to exit - just tells which way to go.
         Humans don't calculate complex paths, just "exit is that way".
@@ -78,150 +100,125 @@ class HumanLikeHandmadeController(BaseController):
         exit_x, exit_y = dungeon.exit_pos
         
         if exit_x > agent.x:
-            x_dir = "right"
+            x_dir: Optional[int] = RIGHT
         elif exit_x < agent.x:
-            x_dir = "left"
+            x_dir = LEFT
         else:
             x_dir = None
             
         if exit_y > agent.y:
-            y_dir = "down"
+            y_dir: Optional[int] = DOWN
         elif exit_y < agent.y:
-            y_dir = "up"
+            y_dir = UP
         else:
             y_dir = None
             
         # Simple priority: if exit is in same row/col, go directly
-        if x_dir and y_dir:
+        if x_dir is not None and y_dir is not None:
             return random.choice([x_dir, y_dir])  # Human would pick one
-        elif x_dir:
+        elif x_dir is not None:
             return x_dir
-        elif y_dir:
+        elif y_dir is not None:
             return y_dir
         else:
-            return "here"  # At exit!
+            return HERE  # At exit!
     
-    def _check_emergency(self, perceptions: dict) -> Optional[Action]:
+    def _check_emergency(self, perceptions: Perception) -> Optional[Action]:
         """
         Check for emergency situations that require immediate action.
         Human thinking: "Oh no, I'm about to die!"
         """
         # Emergency: Very low health
-        if perceptions['my_health'] < 25:
+        if perceptions.health < 25:
             # If I have a health potion, DRINK IT NOW!
-            if perceptions['my_health_potions'] > 0:
+            if perceptions.health_potions > 0:
                 return Action.DRINK_HEALTH
                 
             # If monster is on my tile and I'm this low, try to kill it
-            if perceptions['immediate_danger']:
-                monster_on_me = perceptions['adjacent_tiles']["here"]
-                if monster_on_me == TileType.MONSTER_MELEE:
+            if perceptions.immediate_danger:
+                monster_on_me = perceptions.tiles[HERE]
+                if monster_on_me == MONSTER_MELEE_CODE:
                     return Action.MELEE
-                elif monster_on_me == TileType.MONSTER_MAGIC and perceptions['my_mana'] > 0:
+                elif monster_on_me == MONSTER_MAGIC_CODE and perceptions.mana > 0:
                     return Action.MAGIC_BLAST
                     
         # Emergency: Monster attacking me right now
-        if perceptions['immediate_danger']:
-            monster_on_me = perceptions['adjacent_tiles']["here"]
-            if monster_on_me == TileType.MONSTER_MELEE:
+        if perceptions.immediate_danger:
+            monster_on_me = perceptions.tiles[HERE]
+            if monster_on_me == MONSTER_MELEE_CODE:
                 return Action.MELEE
-            elif monster_on_me == TileType.MONSTER_MAGIC and perceptions['my_mana'] > 0:
+            elif monster_on_me == MONSTER_MAGIC_CODE and perceptions.mana > 0:
                 return Action.MAGIC_BLAST
                 
         return None
     
-    def _check_items_to_collect(self, perceptions: dict, dungeon: Dungeon, agent: Agent) -> Optional[Action]:
+    def _check_items_to_collect(self, perceptions: Perception, dungeon: Dungeon, agent: Agent) -> Optional[Action]:
         """
         Human thinking: "Ooh, shiny! Let me grab that."
         """
         # Check current tile first (if I'm standing on something)
-        current_tile = perceptions['current_tile']
-        if current_tile in [TileType.HEALTH_POTION, TileType.MANA_POTION, TileType.COIN]:
+        tiles = perceptions.tiles
+        if (ITEM_MASK >> tiles[HERE]) & 1:
             # Just wait a moment to ensure collection
             return Action.STAY
             
         # Check adjacent tiles for items
-        for direction, tile in perceptions['adjacent_tiles'].items():
-            if direction == "here":
-                continue
-                
-            if tile in [TileType.HEALTH_POTION, TileType.MANA_POTION, TileType.COIN]:
+        for direction in _NEIGHBOURS:
+            if (ITEM_MASK >> tiles[direction]) & 1:
                 # Move toward the item
-                if direction == "up":
-                    return Action.UP
-                elif direction == "down":
-                    return Action.DOWN
-                elif direction == "left":
-                    return Action.LEFT
-                elif direction == "right":
-                    return Action.RIGHT
+                return _DIRECTION_MOVES[direction][0]
                     
         return None
     
-    def _check_monsters_to_attack(self, perceptions: dict) -> Optional[Action]:
+    def _check_monsters_to_attack(self, perceptions: Perception) -> Optional[Action]:
         """
         Human thinking: "That monster looks dangerous. Should I kill it?"
         """
         # Don't attack if health is too low
-        if perceptions['my_health'] < 40:
+        if perceptions.health < 40:
             return None
             
         # Check for melee monsters first (easier to kill)
-        for direction, tile in perceptions['adjacent_tiles'].items():
-            if tile == TileType.MONSTER_MELEE:
-                return Action.MELEE
+        if MONSTER_MELEE_CODE in perceptions.tiles:
+            return Action.MELEE
                 
         # Check for magic monsters (need mana)
-        for direction, tile in perceptions['adjacent_tiles'].items():
-            if tile == TileType.MONSTER_MAGIC and perceptions['my_mana'] > 0:
-                return Action.MAGIC_BLAST
+        if MONSTER_MAGIC_CODE in perceptions.tiles and perceptions.mana > 0:
+            return Action.MAGIC_BLAST
                 
         return None
     
-    def _check_potions_to_drink(self, perceptions: dict) -> Optional[Action]:
+    def _check_potions_to_drink(self, perceptions: Perception) -> Optional[Action]:
         """
         Human thinking: "I could use a boost..."
         """
         # Drink health potion if health is medium-low and we have potions
-        if perceptions['my_health'] < 60 and perceptions['my_health_potions'] > 0:
+        if perceptions.health < 60 and perceptions.health_potions > 0:
             return Action.DRINK_HEALTH
                 
         # Drink mana potion if we need mana for magic monsters
-        if perceptions['my_mana'] == 0 and perceptions['my_mana_potions'] > 0:
+        if perceptions.mana == 0 and perceptions.mana_potions > 0:
             # Check if there are magic monsters nearby
-            for tile in perceptions['adjacent_tiles'].values():
-                if tile == TileType.MONSTER_MAGIC:
-                    return Action.DRINK_MANA
+            if MONSTER_MAGIC_CODE in perceptions.tiles:
+                return Action.DRINK_MANA
                     
         return None
     
-    def _move_toward_exit(self, perceptions: dict, dungeon: Dungeon, agent: Agent) -> Action:
+    def _move_toward_exit(self, perceptions: Perception, dungeon: Dungeon, agent: Agent) -> Action:
         """
         Human thinking: "The exit is that way... let's go!"
         Simple movement toward exit without pathfinding.
         """
-        exit_dir = perceptions['exit_direction']
+        exit_dir = perceptions.exit_direction
         
-        if exit_dir == "here":
+        if exit_dir == HERE:
             return Action.STAY  # We're at the exit!
             
         # Try to move in the direction of the exit
-        if exit_dir == "up":
-            new_x, new_y = agent.x, agent.y - 1
-            if dungeon.is_walkable(new_x, new_y):
-                return Action.UP
-        elif exit_dir == "down":
-            new_x, new_y = agent.x, agent.y + 1
-            if dungeon.is_walkable(new_x, new_y):
-                return Action.DOWN
-        elif exit_dir == "left":
-            new_x, new_y = agent.x - 1, agent.y
-            if dungeon.is_walkable(new_x, new_y):
-                return Action.LEFT
-        elif exit_dir == "right":
-            new_x, new_y = agent.x + 1, agent.y
-            if dungeon.is_walkable(new_x, new_y):
-                return Action.RIGHT
+        move, (dx, dy) = _DIRECTION_MOVES[exit_dir]
+        # one step from an in-bounds tile, so the padded mask needs no bounds check
+        if dungeon.walkable[agent.y + dy + 1, agent.x + dx + 1]:
+            return move
                 
         # If we can't move toward exit, try a random safe direction
         return self._try_random_safe_move(dungeon, agent)
@@ -230,18 +227,9 @@ class HumanLikeHandmadeController(BaseController):
         """
         Human thinking: "Hmm, can't go that way... let's try another direction."
         """
-        possible_moves = []
-        
-        # Check each direction
-        for action, (dx, dy) in [
-            (Action.UP, (0, -1)),
-            (Action.DOWN, (0, 1)),
-            (Action.LEFT, (-1, 0)),
-            (Action.RIGHT, (1, 0))
-        ]:
-            new_x, new_y = agent.x + dx, agent.y + dy
-            if dungeon.is_walkable(new_x, new_y):
-                possible_moves.append(action)
+        # Check each direction, all from one read of the walkable mask
+        up, down, left, right = dungeon.walkable_mask_at(agent.x, agent.y)
+        possible_moves = _SAFE_MOVES[up | down << 1 | left << 2 | right << 3]
                 
         if possible_moves:
             return random.choice(possible_moves)
@@ -263,23 +251,23 @@ class HumanLikeHandmadeController(BaseController):
         
         # 1. Check for emergencies
         emergency_action = self._check_emergency(perceptions)
-        if emergency_action:
+        if emergency_action is not None:
             return emergency_action
             
         # 2. Check for items to collect (humans love loot!)
         item_action = self._check_items_to_collect(perceptions, dungeon, agent)
-        if item_action:
+        if item_action is not None:
             return item_action
             
         # 3. Check for monsters to attack (if we're feeling brave)
-        if perceptions['my_health'] > 40:
+        if perceptions.health > 40:
             attack_action = self._check_monsters_to_attack(perceptions)
-            if attack_action:
+            if attack_action is not None:
                 return attack_action
                 
         # 4. Check for potions to drink
         potion_action = self._check_potions_to_drink(perceptions)
-        if potion_action:
+        if potion_action is not None:
             return potion_action
             
         # 5. Otherwise, try to move toward exit
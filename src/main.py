@@ -17,7 +17,8 @@ Controls:
     - ESC / window close: Quit.
 """
 import sys
-from typing import Optional, Tuple, List
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
 
 import pygame
 
@@ -87,13 +88,25 @@ def run_game() -> None:
 
     use_ai_controller = False
     ai_controller = DecisionTreeController(genome=BEST_GENOME)
-    ai_controller.reset_episode()
+    ai_controller.start_episode(dungeon)
 
     font = pygame.font.SysFont(None, 24)
+    # rendered HUD lines by (text, color); the strings come from a small fixed set
+    # (floor/AI status, last three action names), so rasterize each one only once
+    text_surfaces: Dict[Tuple[str, Tuple[int, int, int]], pygame.Surface] = {}
 
-    last_actions: List[Action] = []
+    def render_text(text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        surface = text_surfaces.get((text, color))
+        if surface is None:
+            surface = text_surfaces[(text, color)] = font.render(text, True, color)
+        return surface
+
+    last_actions: Deque[Action] = deque(maxlen=3)  # newest last; appending evicts the oldest
     floor_steps: int = 0
 
+    # only redraw after something on screen changed (a step, a key, a window expose)
+    needs_redraw = True
+
     running = True
     while running:
         _dt = clock.tick(FPS)
@@ -101,14 +114,17 @@ def run_game() -> None:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                needs_redraw = True
             elif event.type == pygame.KEYDOWN:
+                needs_redraw = True
                 # Press 'r' to restart from floor 1 with new random floors
                 # 'a' to toggle AI, 'esc' to quit
                 if event.key == pygame.K_r:
                     current_floor = 1
                     dungeon, agent = make_floor()
                     use_ai_controller = False
-                    ai_controller.reset_episode()
+                    ai_controller.start_episode(dungeon)
                     last_actions.clear()
                     floor_steps = 0
                     pygame.display.set_caption(f"5x5 Dungeon - Floor {current_floor}/{MAX_FLOORS}")
@@ -124,14 +140,13 @@ def run_game() -> None:
         if use_ai_controller:
             action = ai_controller.select_action(agent, dungeon)
             last_actions.append(action)
-            if len(last_actions) > 3:
-                last_actions.pop(0)
         else:
             action = handle_keyboard_input()
 
         if action is not None:
             floor_steps += 1
             agent.step(action, dungeon)
+            needs_redraw = True
 
         if agent.at_exit(dungeon):
             floor_score = compute_floor_score(agent, floor_steps)
@@ -147,7 +162,7 @@ def run_game() -> None:
             if current_floor < MAX_FLOORS:
                 current_floor += 1
                 dungeon, agent = make_floor()
-                ai_controller.reset_episode()
+                ai_controller.start_episode(dungeon)
                 last_actions.clear()
                 floor_steps = 0
                 pygame.display.set_caption(f"5x5 Dungeon - Floor {current_floor}/{MAX_FLOORS}")
@@ -156,11 +171,15 @@ def run_game() -> None:
                 print("Completed all 5 floors! Starting a new run at floor 1.")
                 current_floor = 1
                 dungeon, agent = make_floor()
-                ai_controller.reset_episode()
+                ai_controller.start_episode(dungeon)
                 last_actions.clear()
                 floor_steps = 0
                 pygame.display.set_caption(f"5x5 Dungeon - Floor {current_floor}/{MAX_FLOORS}")
 
+        if not needs_redraw:
+            continue
+        needs_redraw = False
+
         # Draw
         screen.fill(COLOR_BG)
         dungeon.draw(screen)
@@ -171,7 +190,7 @@ def run_game() -> None:
             f"Floor {current_floor}/{MAX_FLOORS}  "
             f"AI: {'ON' if use_ai_controller else 'OFF'}  (A toggle, R restart)"
         )
-        text_surface = font.render(hud_text, True, (255, 255, 255))
+        text_surface = render_text(hud_text, (255, 255, 255))
         screen.blit(text_surface, (5, 5))
 
         # last 3 AI decisions
@@ -181,7 +200,7 @@ def run_game() -> None:
                 decisions_text = "Last AI actions: " + ", ".join(names)
             else:
                 decisions_text = "Last AI actions: (none yet)"
-            text_surface2 = font.render(decisions_text, True, (200, 200, 200))
+            text_surface2 = render_text(decisions_text, (200, 200, 200))
             screen.blit(text_surface2, (5, 5 + 22))
 
         pygame.display.flip()
@@ -7,10 +7,15 @@ Responsibilities:
     - Locate sprite assets relative to the project directory.
     - Load PNG files using pygame.image.load.
     - Scale them to TILE_SIZE so they fit exactly one grid cell.
-    - Expose named constants for each sprite:
+    - Expose named constants for each sprite file:
         * SPRITE_WALL, SPRITE_PLAYER, SPRITE_MONSTER_MELEE, ...
+    - Load each sprite on first use (get_sprite), so headless training and
+      its worker processes never decode any images.
+    - Hand out display-format copies (display_sprite) for per-frame blits.
 """
 import os
+from typing import Dict
+
 import pygame
 from config import TILE_SIZE
 
@@ -28,12 +33,47 @@ def load_sprite(filename: str) -> pygame.Surface:
     return image
 
 
-SPRITE_WALL          = load_sprite("rock1.png")
-SPRITE_PLAYER        = load_sprite("player.png")
-SPRITE_MONSTER_MELEE = load_sprite("monster2.png")
-SPRITE_MONSTER_MAGIC = load_sprite("monster1.png")
-SPRITE_HEALTH        = load_sprite("health.png")
-SPRITE_MANA          = load_sprite("bluepot.png")
-SPRITE_EXIT          = load_sprite("exit.png")
-SPRITE_COIN          = load_sprite("coin.png")
+# file name -> scaled sprite, filled lazily by get_sprite
+_SPRITES: Dict[str, pygame.Surface] = {}
+
+
+def get_sprite(filename: str) -> pygame.Surface:
+    """The scaled sprite for filename, loaded from disk only the first time"""
+    sprite = _SPRITES.get(filename)
+    if sprite is None:
+        sprite = _SPRITES[filename] = load_sprite(filename)
+    return sprite
+
+
+# id(sprite) -> sprite.convert_alpha(), filled lazily by display_sprite
+_DISPLAY_SPRITES: Dict[int, pygame.Surface] = {}
+
+
+def display_sprite(sprite: pygame.Surface) -> pygame.Surface:
+    """
+    Sprite converted once to the display's pixel format, so per-frame blits
+    are straight copies instead of per-pixel format conversions.
+
+    Sprites can be loaded before any display mode exists, so they can't be
+    converted up front. Until a display is set this
+    returns the sprite unchanged.
+    """
+    converted = _DISPLAY_SPRITES.get(id(sprite))
+    if converted is None:
+        if pygame.display.get_surface() is None:
+            return sprite
+        converted = sprite.convert_alpha()
+        _DISPLAY_SPRITES[id(sprite)] = converted
+    return converted
+
+
+# sprite files, for get_sprite
+SPRITE_WALL          = "rock1.png"
+SPRITE_PLAYER        = "player.png"
+SPRITE_MONSTER_MELEE = "monster2.png"
+SPRITE_MONSTER_MAGIC = "monster1.png"
+SPRITE_HEALTH        = "health.png"
+SPRITE_MANA          = "bluepot.png"
+SPRITE_EXIT          = "exit.png"
+SPRITE_COIN          = "coin.png"
 
@@ -13,28 +13,76 @@ Key functions:
     - compute_floor_score(...): convert episode stats into a scalar reward.
     - evaluate_controller(controller, num_episodes): average the score
       over multiple randomized floors to estimate fitness.
+    - play_controllers(controllers, num_episodes): per-episode stats for
+      a whole batch, generating each seeded floor once for all of them.
+    - EPISODE_CODE_VERSION: digest of the code episodes depend on, for
+      caches of episode results persisted between runs.
 """
-from typing import Tuple, Optional
+from typing import Dict, List, Sequence, Tuple, Optional
+import hashlib
+import os
 import random
 
-from dungeon import Dungeon
+import numpy as np
+
+from dungeon import Dungeon, Layout
 from agent import Agent
 from controllers import BaseController, RandomWalkerController, DecisionTreeController
+from fast_ops import HAVE_NUMBA, decision_tree_episode, decision_tree_episodes
 
 
 MAX_STEPS_PER_EPISODE = 50
 
+# getrandbits(32) words first handed to a compiled episode; most episodes
+# use far fewer, and the rest are replayed with more
+EPISODE_RANDOM_WORDS = 64
+
+EpisodeStats = Tuple[bool, int, int, int, int, int, int, int, int]
+
+# modules whose source decides an episode's stats (see EPISODE_CODE_VERSION)
+_EPISODE_SOURCES = ("agent.py", "config.py", "controllers.py", "dungeon.py", "fast_ops.py", "training.py")
+
+# seed -> save_layout() of that seeded default-size floor, filled lazily by _floor_layout
+_FLOOR_LAYOUTS: Dict[int, Layout] = {}
+
+
+def _episode_code_version() -> Optional[str]:
+    """
+    Short digest of the _EPISODE_SOURCES files, or None when they can't be
+    read (e.g. a mypyc-compiled deployment shipped without its .py sources)
+    """
+    digest = hashlib.sha256()
+    try:
+        for name in _EPISODE_SOURCES:
+            with open(os.path.join(os.path.dirname(__file__), name), "rb") as f:
+                digest.update(f.read())
+    except OSError:
+        return None
+    return digest.hexdigest()[:16]
+
 
-def manhattan(a, b) -> int:
-    (x1, y1), (x2, y2) = a, b
-    return abs(x1 - x2) + abs(y1 - y2)
+# changes whenever the code behind an episode does; persisted episode
+# results are only reused while it matches, and never when it is None
+# (the code version is unknown)
+EPISODE_CODE_VERSION = _episode_code_version()
 
 
-def run_episode(
-    controller: BaseController, seed: Optional[int] = None
-) -> Tuple[bool, int, int, int, int, int, int, int, int]:
+def run_episode(controller: BaseController, seed: Optional[int] = None) -> EpisodeStats:
     """
     Run a single episode with the controller on a randomized 5x5 dungeon
+    (see play_episode for the returned stats)
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    dungeon = Dungeon()
+    dungeon.generate_random_layout(seed)
+    return play_episode(controller, dungeon)
+
+
+def play_episode(controller: BaseController, dungeon: Dungeon) -> EpisodeStats:
+    """
+    Run a single episode with the controller on an already generated dungeon
 
     Returns:
         reached_exit: bool
@@ -47,24 +95,26 @@ def run_episode(
         final_distance_to_exit: int
         best_distance_to_exit: int
     """
-    if seed is not None:
-        random.seed(seed)
+    controller.start_episode(dungeon)
 
-    controller.reset_episode()
+    if HAVE_NUMBA and type(controller) is DecisionTreeController:
+        return _play_decision_tree_episode(controller, dungeon)
+    return _play_python_episode(controller, dungeon)
 
-    dungeon = Dungeon()
-    dungeon.generate_random_layout(seed)
 
+def _play_python_episode(controller: BaseController, dungeon: Dungeon) -> EpisodeStats:
+    """play_episode's interpreted loop: Agent.step on controller.select_action"""
     agent = Agent(dungeon.start_pos)
+    ex, ey = dungeon.exit_pos
 
-    initial_dist = manhattan(agent.pos, dungeon.exit_pos)
+    initial_dist = abs(agent.x - ex) + abs(agent.y - ey)
     best_dist = initial_dist
 
     for step in range(MAX_STEPS_PER_EPISODE):
         action = controller.select_action(agent, dungeon)
         agent.step(action, dungeon)
 
-        current_dist = manhattan(agent.pos, dungeon.exit_pos)
+        current_dist = abs(agent.x - ex) + abs(agent.y - ey)
         if current_dist < best_dist:
             best_dist = current_dist
 
@@ -83,8 +133,8 @@ def run_episode(
                 best_dist,
             )
 
-        # success
-        if agent.at_exit(dungeon):
+        # success (only the exit tile is at distance 0)
+        if current_dist == 0:
             final_dist = 0
             best_dist = 0
             return (
@@ -100,7 +150,7 @@ def run_episode(
             )
 
     # timeout
-    final_dist = manhattan(agent.pos, dungeon.exit_pos)
+    final_dist = abs(agent.x - ex) + abs(agent.y - ey)
     return (
         False,
         MAX_STEPS_PER_EPISODE,
@@ -114,52 +164,182 @@ def run_episode(
     )
 
 
-def evaluate_controller(controller: BaseController, num_episodes: int = 10) -> float:
+def _play_decision_tree_episode(
+    controller: DecisionTreeController, dungeon: Dungeon, first_words: int = EPISODE_RANDOM_WORDS
+) -> EpisodeStats:
+    """
+    play_episode for a plain DecisionTreeController as one compiled
+    fast_ops.decision_tree_episode call.
+
+    The controller's random.choice draws are replayed from getrandbits(32)
+    words taken from the global random generator, first_words at first, so
+    the stats and the dungeon's final state match the Python loop exactly
+    (tests/test_compiled_episodes.py checks this). The generator ends
+    up past every word drawn, not just the ones used; callers that need
+    reproducible episodes seed it per episode anyway (run_episode,
+    play_controllers).
     """
-    Fitness combining:
+    agent = Agent(dungeon.start_pos)
+    ex, ey = dungeon.exit_pos
+    padded, walkable = dungeon.padded.copy(), dungeon.walkable.copy()
+    words = _random_words(first_words)
+    while True:
+        stats, used = decision_tree_episode(
+            dungeon.padded, dungeon.walkable, controller._action_codes, agent.x, agent.y, ex, ey,
+            agent.health, agent.max_health, agent.mana, agent.max_mana, MAX_STEPS_PER_EPISODE, words,
+        )
+        if used >= 0:
+            return episode_stats_from_row(stats.tolist())
+        # ran out of words: undo the floor changes and replay with the stream extended
+        dungeon.padded[...] = padded
+        dungeon.walkable[...] = walkable
+        words = np.concatenate((words, _random_words(len(words))))
+
+
+def episode_stats_from_row(row: List[int]) -> EpisodeStats:
+    """EpisodeStats from an int stats row (a compiled episode's, or a saved cache's)"""
+    reached_exit, *counts = row
+    return (bool(reached_exit), *counts)  # type: ignore[return-value]
+
+
+def _random_words(count: int) -> np.ndarray:
+    """The global random generator's next count getrandbits(32) outputs, in order"""
+    return np.frombuffer(random.getrandbits(32 * count).to_bytes(4 * count, "little"), dtype=np.uint32)
+
+
+def episode_reward(stats: EpisodeStats) -> float:
+    """
+    Fitness of one episode, combining:
       + Big reward for reaching exit
       + Reward for closest distance to exit reached
       + Reward for killing monsters, collecting potions, collecting coins
       - Penalty for damage
     """
+    (
+        reached_exit,
+        steps,
+        damage_taken,
+        monsters_killed,
+        potions_collected,
+        coins_collected,
+        initial_dist,
+        final_dist,
+        best_dist,
+    ) = stats
+
+    dist_improvement = max(0, initial_dist - best_dist)
+
+    if reached_exit:
+        reward = 200.0 - 4.0 * steps
+    else:
+        reward = -30.0
+
+    # Progress
+    reward += 8.0 * dist_improvement
+
+    # combat + items
+    reward += 25.0 * monsters_killed
+    reward += 5.0 * potions_collected
+
+    # encourage coins
+    reward += 20.0 * coins_collected
+
+    # Penalize damage
+    reward -= 0.3 * damage_taken
+
+    return reward
+
+
+def evaluate_controller(controller: BaseController, num_episodes: int = 10) -> float:
+    """
+    Mean episode_reward over the floors seeded 0 .. num_episodes - 1
+    """
     total_reward = 0.0
 
     for ep in range(num_episodes):
-        (
-            reached_exit,
-            steps,
-            damage_taken,
-            monsters_killed,
-            potions_collected,
-            coins_collected,
-            initial_dist,
-            final_dist,
-            best_dist,
-        ) = run_episode(controller, seed=ep)
+        total_reward += episode_reward(run_episode(controller, seed=ep))
 
-        dist_improvement = max(0, initial_dist - best_dist)
+    return total_reward / num_episodes
 
-        if reached_exit:
-            reward = 200.0 - 4.0 * steps
-        else:
-            reward = -30.0
 
-        # Progress
-        reward += 8.0 * dist_improvement
+def play_controllers(
+    controllers: Sequence[BaseController], num_episodes: int = 10, first_episode: int = 0
+) -> List[List[EpisodeStats]]:
+    """
+    Stats of every controller on the floors seeded
+    first_episode .. first_episode + num_episodes - 1, one list per controller.
 
-        # combat + items
-        reward += 25.0 * monsters_killed
-        reward += 5.0 * potions_collected
+    Each floor is generated once per process (see _floor_layout) and reloaded
+    for every controller instead of being rebuilt per controller; with the
+    global RNG reseeded per episode the stats match run_episode exactly.
+    """
+    stats: List[List[EpisodeStats]] = [[] for _ in controllers]
+    dungeon = Dungeon()
 
-        # encourage coins
-        reward += 20.0 * coins_collected
+    # a batch of plain DecisionTreeControllers plays each floor in one compiled call
+    action_tables = None
+    if HAVE_NUMBA and all(type(c) is DecisionTreeController for c in controllers):
+        action_tables = np.array([c._action_codes for c in controllers], dtype=np.int8)  # type: ignore[attr-defined]
 
-        # Penalize damage
-        reward -= 0.3 * damage_taken
+    for col in range(num_episodes):
+        ep = first_episode + col
+        layout = _floor_layout(ep)
+        dungeon.load_layout(layout)
+        if action_tables is not None:
+            for row, episode in zip(stats, _decision_tree_stats(action_tables, dungeon, ep)):
+                row.append(episode)
+            continue
+        for row, controller in zip(stats, controllers):
+            random.seed(ep)
+            dungeon.load_layout(layout)
+            row.append(play_episode(controller, dungeon))
 
-        total_reward += reward
+    return stats
 
-    return total_reward / num_episodes
+
+def _floor_layout(seed: int) -> Layout:
+    """
+    Layout of the default-size floor generate_random_layout(seed) builds.
+    Generated once per process: the GA replays the same few floors every
+    generation, in many small worker batches. Only pass it to load_layout,
+    which copies it.
+    """
+    layout = _FLOOR_LAYOUTS.get(seed)
+    if layout is None:
+        dungeon = Dungeon()
+        dungeon.generate_random_layout(seed)
+        layout = _FLOOR_LAYOUTS[seed] = dungeon.save_layout()
+    return layout
+
+
+def _decision_tree_stats(
+    action_tables: np.ndarray, dungeon: Dungeon, seed: int, first_words: int = EPISODE_RANDOM_WORDS
+) -> List[EpisodeStats]:
+    """
+    Stats for each row of action_tables (DecisionTreeController action
+    tables) on the freshly loaded dungeon, with the global RNG seeded to
+    seed before each one: the same stats play_controllers' per-controller
+    loop gives (tests/test_compiled_episodes.py checks this). All rows
+    replay one word stream of first_words, extended for the episodes that
+    run out of it.
+    """
+    agent = Agent(dungeon.start_pos)
+    ex, ey = dungeon.exit_pos
+    random.seed(seed)
+    words = _random_words(first_words)
+    stats = np.zeros((len(action_tables), 9), dtype=np.int64)
+    todo = np.ones(len(action_tables), dtype=bool)
+    while True:
+        batch_stats, used = decision_tree_episodes(
+            dungeon.padded, dungeon.walkable, action_tables, agent.x, agent.y, ex, ey,
+            agent.health, agent.max_health, agent.mana, agent.max_mana, MAX_STEPS_PER_EPISODE, words, todo,
+        )
+        finished = todo & (used >= 0)
+        stats[finished] = batch_stats[finished]
+        todo &= ~finished
+        if not todo.any():
+            return [episode_stats_from_row(row) for row in stats.tolist()]
+        words = np.concatenate((words, _random_words(len(words))))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+"""
+Parity of the compiled decision-tree episodes in fast_ops with the Python
+episode loop whose rules they copy by hand (training._play_python_episode
+driving DecisionTreeController.select_action and Agent.step).
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import os
+import random
+import sys
+import unittest
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np
+
+import training
+from controllers import DecisionTreeController
+from dungeon import Dungeon
+
+NUM_FLOORS = 40
+NUM_GENOMES = 6
+# a one-word stream runs out in almost every episode, so the replay with
+# more words is exercised as well as the usual first draw
+WORD_COUNTS = (1, training.EPISODE_RANDOM_WORDS)
+
+
+class CompiledEpisodeParityTest(unittest.TestCase):
+    """Compiled episodes (single, and batched per floor) vs the Python loop"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = np.random.default_rng(0)
+        cls.controllers = [
+            DecisionTreeController(
+                rng.integers(0, DecisionTreeController.num_actions(), DecisionTreeController.num_genes()).tolist()
+            )
+            for _ in range(NUM_GENOMES)
+        ]
+        cls.dungeon = Dungeon()
+        # floor seed -> [(stats, final padded grid)] per controller, from the Python loop
+        cls.expected = {}
+        for seed in range(NUM_FLOORS):
+            results = []
+            for controller in cls.controllers:
+                cls._load(seed, controller)
+                stats = training._play_python_episode(controller, cls.dungeon)
+                results.append((stats, cls.dungeon.padded.copy()))
+            cls.expected[seed] = results
+
+    @classmethod
+    def _load(cls, seed: int, controller: DecisionTreeController) -> None:
+        """Fresh floor seed and global RNG, as play_controllers sets them up"""
+        cls.dungeon.load_layout(training._floor_layout(seed))
+        random.seed(seed)
+        controller.start_episode(cls.dungeon)
+
+    def test_single_episodes_match_python_loop(self) -> None:
+        for seed, results in self.expected.items():
+            for i, (controller, (stats, floor)) in enumerate(zip(self.controllers, results)):
+                for first_words in WORD_COUNTS:
+                    with self.subTest(floor=seed, genome=i, first_words=first_words):
+                        self._load(seed, controller)
+                        got = training._play_decision_tree_episode(controller, self.dungeon, first_words)
+                        self.assertEqual(got, stats)
+                        np.testing.assert_array_equal(self.dungeon.padded, floor)
+
+    def test_batched_floors_match_python_loop(self) -> None:
+        action_tables = np.array([c._action_codes for c in self.controllers], dtype=np.int8)
+        for seed, results in self.expected.items():
+            for first_words in WORD_COUNTS:
+                with self.subTest(floor=seed, first_words=first_words):
+                    self.dungeon.load_layout(training._floor_layout(seed))
+                    got = training._decision_tree_stats(action_tables, self.dungeon, seed, first_words)
+                    self.assertEqual(got, [stats for stats, _ in results])
+
+
+if __name__ == "__main__":
+    unittest.main()